@@ -4,23 +4,38 @@ Hackathon 2025 - SDG 2 & SDG 3 Solution
 Advanced Flask API with AI, Community, and Wellness Features
 """
 
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, request, jsonify, render_template, send_from_directory, abort
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
-from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta, time
 import sqlite3
 import os
 import json
 import random
 import re
+import uuid
+import hashlib
+import tempfile
 import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
 from typing import List, Dict, Optional
+from backend.json_provider import ORJSONProvider
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+# '/api/foo/' matches the '/api/foo' rule directly instead of falling through
+# to the static catch-all
+app.url_map.strict_slashes = False
 
 # Production-ready configuration
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'smarteats-hackathon-2025-sdg-key')
@@ -28,9 +43,26 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///smarteats.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.environ.get('SECRET_KEY', 'jwt-secret-smarteats-2025')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
+# scrypt N=2^14, r=8, p=1 - the interactive-login cost from RFC 7914, about half
+# the work of Werkzeug's default. Existing hashes keep verifying because the
+# method is stored with each hash.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
 
 # Initialize extensions
 db = SQLAlchemy(app)
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL journal so readers don't block on writers, plus cheaper syncs and a bigger page cache"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-65536')  # 64 MB
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')  # 256 MB
+    cursor.close()
 jwt = JWTManager(app)
 CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:5500", "*"])
 
@@ -39,25 +71,27 @@ CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:5500", "*"])
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_premium = db.Column(db.Boolean, default=False)
     
     # Relationships
-    profiles = db.relationship('UserProfile', backref='user', lazy=True)
-    meals = db.relationship('MealLog', backref='user', lazy=True)
-    achievements = db.relationship('UserAchievement', backref='user', lazy=True)
+    profiles = db.relationship('UserProfile', back_populates='user', lazy=True)
+    meals = db.relationship('MealLog', back_populates='user', lazy=True)
+    achievements = db.relationship('UserAchievement', back_populates='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password, method=app.config['PASSWORD_HASH_METHOD']
+        )
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
 class UserProfile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True, index=True)
     age = db.Column(db.Integer)
     gender = db.Column(db.String(10))
     height = db.Column(db.Float)  # in cm
@@ -66,10 +100,12 @@ class UserProfile(db.Model):
     dietary_restrictions = db.Column(db.Text)  # JSON string
     health_goals = db.Column(db.Text)  # JSON string
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User', back_populates='profiles')
 
 class NutritionPlan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     calories = db.Column(db.Float)
     protein = db.Column(db.Float)
     carbs = db.Column(db.Float)
@@ -90,10 +126,15 @@ class MealLog(db.Model):
     fat = db.Column(db.Float)
     meal_type = db.Column(db.String(20))  # breakfast, lunch, dinner, snack
     logged_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User', back_populates='meals')
+    
+    # Also serves plain user_id lookups (leftmost column), so no separate FK index
+    __table_args__ = (db.Index('ix_meal_log_user_logged_at', 'user_id', 'logged_at'),)
 
 class Achievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
     description = db.Column(db.Text)
     badge_emoji = db.Column(db.String(10))
     points = db.Column(db.Integer, default=0)
@@ -101,13 +142,15 @@ class Achievement(db.Model):
 
 class UserAchievement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    achievement_id = db.Column(db.Integer, db.ForeignKey('achievement.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    achievement_id = db.Column(db.Integer, db.ForeignKey('achievement.id'), nullable=False, index=True)
     earned_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    user = db.relationship('User', back_populates='achievements')
 
 class CommunityPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text)
     category = db.Column(db.String(50))  # recipe, tip, success_story, question
@@ -116,6 +159,14 @@ class CommunityPost(db.Model):
 
 # ===== NUTRITION CALCULATOR =====
 
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'very': 1.725,
+    'extra': 1.9
+}
+
 class NutritionCalculator:
     @staticmethod
     def calculate_bmr(weight, height, age, gender):
@@ -128,14 +179,7 @@ class NutritionCalculator:
     @staticmethod
     def calculate_tdee(bmr, activity_level):
         """Calculate Total Daily Energy Expenditure"""
-        activity_multipliers = {
-            'sedentary': 1.2,
-            'light': 1.375,
-            'moderate': 1.55,
-            'very': 1.725,
-            'extra': 1.9
-        }
-        return bmr * activity_multipliers.get(activity_level, 1.2)
+        return bmr * ACTIVITY_MULTIPLIERS.get(activity_level, 1.2)
     
     @staticmethod
     def calculate_macros(tdee, weight, goal='maintain'):
@@ -162,6 +206,34 @@ class NutritionCalculator:
 
 # ===== AI CHAT SYSTEM =====
 
+# Response tables keyed by (intent, language). Personalized entries are
+# str.format_map templates filled with {weight} and {protein}.
+PERSONALIZED_RESPONSES = {
+    ('protein', 'en'): "Based on your {weight}kg weight, you need about {protein}g protein daily. Great sources include lean meats, fish, eggs, and legumes!",
+    ('protein', 'es'): "Basado en tu peso de {weight}kg, necesitas aproximadamente {protein}g de proteína diariamente.",
+    ('protein', 'fr'): "Basé sur votre poids de {weight}kg, vous avez besoin d'environ {protein}g de protéines par jour.",
+    ('weight_loss', 'en'): "For healthy weight loss, aim for a deficit of 300-500 calories from your maintenance level. Stay consistent and patient!",
+    ('weight_loss', 'es'): "Para una pérdida de peso saludable, apunta a un déficit de 300-500 calorías de tu nivel de mantenimiento.",
+    ('weight_loss', 'fr'): "Pour une perte de poids saine, visez un déficit de 300-500 calories par rapport à votre niveau de maintenance."
+}
+DEFAULT_PERSONALIZED_RESPONSE = "I'm here to help with your nutrition journey! Ask me about protein, weight management, hydration, or meal planning."
+
+GENERAL_RESPONSES = {
+    ('protein', 'en'): "🥩 Protein is essential for muscle building and repair! Aim for 0.8-2.2g per kg body weight. Great sources: lean meats, fish, eggs, dairy, legumes, and quinoa.",
+    ('protein', 'es'): "🥩 ¡La proteína es esencial para construir y reparar músculos! Apunta a 0.8-2.2g por kg de peso corporal.",
+    ('protein', 'fr'): "🥩 Les protéines sont essentielles pour la construction et la réparation musculaire! Visez 0,8-2,2g par kg de poids corporel.",
+    ('hydration', 'en'): "💧 Stay hydrated! Aim for 8-10 glasses (2-3L) of water daily. More if you're active or in hot weather. Your urine should be pale yellow.",
+    ('hydration', 'es'): "💧 ¡Mantente hidratado! Apunta a 8-10 vasos (2-3L) de agua diariamente.",
+    ('hydration', 'fr'): "💧 Restez hydraté! Visez 8-10 verres (2-3L) d'eau par jour.",
+    ('general', 'en'): "🍎 I'm your AI nutrition assistant! I can help with meal planning, macro calculations, healthy recipes, and wellness tips. What would you like to know?",
+    ('general', 'es'): "🍎 ¡Soy tu asistente nutricional AI! Puedo ayudar con planificación de comidas, cálculos de macros, recetas saludables y consejos de bienestar.",
+    ('general', 'fr'): "🍎 Je suis votre assistant nutritionnel IA! Je peux aider avec la planification des repas, les calculs de macros, les recettes saines et les conseils de bien-être."
+}
+# English reply per intent, used when a language has no translation
+GENERAL_FALLBACK_RESPONSES = {
+    intent: response for (intent, language), response in GENERAL_RESPONSES.items() if language == 'en'
+}
+
 class AINutritionBot:
     def __init__(self):
         self.language_patterns = {
@@ -176,6 +248,11 @@ class AINutritionBot:
             'ko': re.compile(r'[가-힯]'),
             'ru': re.compile(r'[Ѐ-ӿ]'),
         }
+        # All language patterns as one alternation so detection is a single scan
+        self.language_regex = re.compile(
+            '|'.join(f'(?P<{lang}>{pattern.pattern})' for lang, pattern in self.language_patterns.items()),
+            re.I
+        )
         
         self.nutrition_keywords = {
             'protein': ['protein', 'protien', 'muscle', 'amino', 'meat', 'fish', 'eggs'],
@@ -187,19 +264,29 @@ class AINutritionBot:
             'diabetes': ['diabetes', 'blood sugar', 'glucose', 'insulin'],
             'heart_health': ['heart', 'cholesterol', 'blood pressure', 'cardiovascular']
         }
+        # Keyword -> intent map plus one alternation over every keyword, so intent
+        # detection is a single pass over the message (longest keywords first)
+        self.keyword_intents = {
+            keyword: intent
+            for intent, keywords in self.nutrition_keywords.items()
+            for keyword in keywords
+        }
+        self.intent_regex = re.compile('|'.join(
+            re.escape(keyword) for keyword in sorted(self.keyword_intents, key=len, reverse=True)
+        ))
     
     def detect_language(self, message):
-        for lang, pattern in self.language_patterns.items():
-            if pattern.search(message):
-                return lang
-        return 'en'
+        match = self.language_regex.search(message)
+        return match.lastgroup if match else 'en'
     
     def detect_intent(self, message):
-        message_lower = message.lower()
-        for intent, keywords in self.nutrition_keywords.items():
-            if any(keyword in message_lower for keyword in keywords):
+        found = {self.keyword_intents[m.group()] for m in self.intent_regex.finditer(message.lower())}
+        if not found:
+            return 'general'
+        # Keep the original priority: first intent in nutrition_keywords order wins
+        for intent in self.nutrition_keywords:
+            if intent in found:
                 return intent
-        return 'general'
     
     def generate_response(self, message, user_profile=None):
         language = self.detect_language(message)
@@ -212,42 +299,20 @@ class AINutritionBot:
         return self.get_general_response(intent, language)
     
     def get_personalized_response(self, intent, language, profile):
-        responses = {
-            'protein': {
-                'en': f"Based on your {profile.get('weight', 70)}kg weight, you need about {round(profile.get('weight', 70) * 2.2)}g protein daily. Great sources include lean meats, fish, eggs, and legumes!",
-                'es': f"Basado en tu peso de {profile.get('weight', 70)}kg, necesitas aproximadamente {round(profile.get('weight', 70) * 2.2)}g de proteína diariamente.",
-                'fr': f"Basé sur votre poids de {profile.get('weight', 70)}kg, vous avez besoin d'environ {round(profile.get('weight', 70) * 2.2)}g de protéines par jour."
-            },
-            'weight_loss': {
-                'en': f"For healthy weight loss, aim for a deficit of 300-500 calories from your maintenance level. Stay consistent and patient!",
-                'es': f"Para una pérdida de peso saludable, apunta a un déficit de 300-500 calorías de tu nivel de mantenimiento.",
-                'fr': f"Pour une perte de poids saine, visez un déficit de 300-500 calories par rapport à votre niveau de maintenance."
-            }
-        }
+        template = PERSONALIZED_RESPONSES.get((intent, language))
+        if template is None:
+            return DEFAULT_PERSONALIZED_RESPONSE
         
-        return responses.get(intent, {}).get(language, 
-            "I'm here to help with your nutrition journey! Ask me about protein, weight management, hydration, or meal planning.")
+        weight = profile.get('weight', 70)
+        return template.format_map({'weight': weight, 'protein': round(weight * 2.2)})
 
     def get_general_response(self, intent, language):
-        responses = {
-            'protein': {
-                'en': "🥩 Protein is essential for muscle building and repair! Aim for 0.8-2.2g per kg body weight. Great sources: lean meats, fish, eggs, dairy, legumes, and quinoa.",
-                'es': "🥩 ¡La proteína es esencial para construir y reparar músculos! Apunta a 0.8-2.2g por kg de peso corporal.",
-                'fr': "🥩 Les protéines sont essentielles pour la construction et la réparation musculaire! Visez 0,8-2,2g par kg de poids corporel."
-            },
-            'hydration': {
-                'en': "💧 Stay hydrated! Aim for 8-10 glasses (2-3L) of water daily. More if you're active or in hot weather. Your urine should be pale yellow.",
-                'es': "💧 ¡Mantente hidratado! Apunta a 8-10 vasos (2-3L) de agua diariamente.",
-                'fr': "💧 Restez hydraté! Visez 8-10 verres (2-3L) d'eau par jour."
-            },
-            'general': {
-                'en': "🍎 I'm your AI nutrition assistant! I can help with meal planning, macro calculations, healthy recipes, and wellness tips. What would you like to know?",
-                'es': "🍎 ¡Soy tu asistente nutricional AI! Puedo ayudar con planificación de comidas, cálculos de macros, recetas saludables y consejos de bienestar.",
-                'fr': "🍎 Je suis votre assistant nutritionnel IA! Je peux aider avec la planification des repas, les calculs de macros, les recettes saines et les conseils de bien-être."
-            }
-        }
-        
-        return responses.get(intent, responses['general']).get(language, responses.get(intent, responses['general'])['en'])
+        response = GENERAL_RESPONSES.get((intent, language))
+        if response is not None:
+            return response
+        if intent in GENERAL_FALLBACK_RESPONSES:
+            return GENERAL_FALLBACK_RESPONSES[intent]
+        return GENERAL_RESPONSES.get(('general', language), GENERAL_FALLBACK_RESPONSES['general'])
 
 # Initialize AI bot
 ai_bot = AINutritionBot()
@@ -288,6 +353,13 @@ def api_health():
 
 # ===== IMAGE ROUTES =====
 
+ALLOWED_IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'webp', 'svg'})
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def image_extension(filename):
+    """Lowercased file extension without the dot ('' if there is none)"""
+    return Path(filename).suffix.lower().lstrip('.')
+
 @app.route('/images/<path:filepath>')
 def serve_images(filepath):
     """Serve images from the images directory"""
@@ -309,19 +381,26 @@ def upload_image():
             return jsonify({'success': False, 'message': 'No file selected'}), 400
         
         # Check file type
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'webp', 'svg'}
-        if not ('.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions):
+        file_extension = image_extension(file.filename)
+        if file_extension not in ALLOWED_IMAGE_EXTENSIONS:
             return jsonify({'success': False, 'message': 'Invalid file type'}), 400
         
-        # Generate unique filename
-        import uuid
-        file_extension = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
+        # Stream to a temp file while hashing; identical images share one file
+        upload_dir = os.path.join('images', 'uploads')
+        os.makedirs(upload_dir, exist_ok=True)
         
-        # Save to uploads directory
-        import os
-        upload_path = os.path.join('images', 'uploads', unique_filename)
-        file.save(upload_path)
+        content_hash = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=upload_dir, delete=False) as tmp:
+            for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                content_hash.update(chunk)
+                tmp.write(chunk)
+        
+        unique_filename = f"{content_hash.hexdigest()[:32]}.{file_extension}"
+        upload_path = os.path.join(upload_dir, unique_filename)
+        if os.path.exists(upload_path):
+            os.unlink(tmp.name)
+        else:
+            os.replace(tmp.name, upload_path)
         
         return jsonify({
             'success': True,
@@ -333,43 +412,69 @@ def upload_image():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+IMAGE_CATEGORIES = ('logos', 'icons', 'foods', 'uploads')
+
+def image_dir_mtimes():
+    """Modification time of each image category directory (None if missing)"""
+    mtimes = []
+    for category in IMAGE_CATEGORIES:
+        try:
+            mtimes.append(os.stat(os.path.join('images', category)).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+@lru_cache(maxsize=1)
+def scan_images(dir_mtimes):
+    """Scan the image directories; cached until a directory's mtime changes"""
+    images = {category: [] for category in IMAGE_CATEGORIES}
+    
+    for category, mtime in zip(IMAGE_CATEGORIES, dir_mtimes):
+        if mtime is None:
+            continue
+        with os.scandir(os.path.join('images', category)) as entries:
+            for entry in entries:
+                if image_extension(entry.name) in ALLOWED_IMAGE_EXTENSIONS:
+                    images[category].append({
+                        'filename': entry.name,
+                        'url': f'/images/{category}/{entry.name}'
+                    })
+    
+    return images
+
 @app.route('/api/images/list')
 def list_images():
     """List available images by category"""
     try:
-        import os
-        images = {
-            'logos': [],
-            'icons': [],
-            'foods': [],
-            'uploads': []
-        }
-        
-        for category in images.keys():
-            category_path = os.path.join('images', category)
-            if os.path.exists(category_path):
-                for filename in os.listdir(category_path):
-                    if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.webp', '.svg')):
-                        images[category].append({
-                            'filename': filename,
-                            'url': f'/images/{category}/{filename}'
-                        })
-        
         return jsonify({
             'success': True,
-            'images': images
+            'images': scan_images(image_dir_mtimes())
         })
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# Frontend asset types the fallback static route may serve; nginx serves these
+# directly in production, so this route only sees traffic without a proxy
+FRONTEND_ASSET_EXTENSIONS = frozenset({
+    'html', 'css', 'js', 'json', 'svg', 'png', 'jpg', 'jpeg', 'webp', 'ico'
+})
+
 @app.route('/<path:filename>')
 def serve_static(filename):
-    """Serve static files"""
+    """Serve frontend assets (fallback when no reverse proxy is in front)"""
+    # Reject probes for anything else (.py, .env, .db, ...) without touching the filesystem
+    if image_extension(filename) not in FRONTEND_ASSET_EXTENSIONS:
+        abort(404)
     return send_from_directory('.', filename)
 
 # ===== AUTHENTICATION ROUTES =====
 
+# Checked against when the email is unknown, to keep login timing uniform
+DUMMY_PASSWORD_HASH = generate_password_hash(
+    uuid.uuid4().hex, method=app.config['PASSWORD_HASH_METHOD']
+)
+
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     try:
@@ -379,7 +484,11 @@ def register():
         if not all(k in data for k in ('name', 'email', 'password')):
             return jsonify({'success': False, 'message': 'Missing required fields'}), 400
         
-        if User.query.filter_by(email=data['email']).first():
+        # Existence probe - no need to load a full User row
+        email_taken = db.session.query(
+            db.exists().where(User.email == data['email'])
+        ).scalar()
+        if email_taken:
             return jsonify({'success': False, 'message': 'Email already registered'}), 409
         
         # Create user
@@ -414,9 +523,17 @@ def login():
     try:
         data = request.get_json()
         
-        user = User.query.filter_by(email=data['email']).first()
+        # Fetch only the columns needed to verify the password and build the response
+        user = db.session.execute(
+            db.select(User.id, User.name, User.email, User.password_hash, User.is_premium)
+            .where(User.email == data['email'])
+        ).first()
+        
+        # Always run one hash check so unknown emails take as long as wrong passwords
+        password_hash = user.password_hash if user else DUMMY_PASSWORD_HASH
+        password_ok = check_password_hash(password_hash, data['password'])
         
-        if user and user.check_password(data['password']):
+        if user and password_ok:
             access_token = create_access_token(identity=user.id)
             
             return jsonify({
@@ -471,20 +588,24 @@ def calculate_nutrition():
             bmi=round(bmi, 1)
         )
         
-        # Update user profile
-        profile = UserProfile.query.filter_by(user_id=user_id).first()
-        if not profile:
-            profile = UserProfile(user_id=user_id)
-        
-        profile.age = data['age']
-        profile.gender = data['gender']
-        profile.height = data['height']
-        profile.weight = data['weight']
-        profile.activity_level = data['activity']
-        profile.updated_at = datetime.utcnow()
+        # Upsert user profile in one statement (no SELECT round-trip first)
+        profile_values = {
+            'age': data['age'],
+            'gender': data['gender'],
+            'height': data['height'],
+            'weight': data['weight'],
+            'activity_level': data['activity'],
+            'updated_at': datetime.utcnow()
+        }
+        upsert_profile = sqlite_insert(UserProfile).values(
+            user_id=user_id, **profile_values
+        ).on_conflict_do_update(
+            index_elements=[UserProfile.user_id],
+            set_=profile_values
+        )
         
         db.session.add(nutrition_plan)
-        db.session.add(profile)
+        db.session.execute(upsert_profile)
         db.session.commit()
         
         return jsonify({
@@ -504,35 +625,40 @@ def calculate_nutrition():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+# Sample nutrition database (in production, use a real API like USDA)
+NUTRITION_DB = {
+    'banana': {'calories': 105, 'protein': 1.3, 'carbs': 27, 'fat': 0.3, 'fiber': 3.1},
+    'apple': {'calories': 95, 'protein': 0.5, 'carbs': 25, 'fat': 0.3, 'fiber': 4.4},
+    'chicken breast': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6, 'fiber': 0},
+    'salmon': {'calories': 208, 'protein': 22, 'carbs': 0, 'fat': 12, 'fiber': 0},
+    'rice': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3, 'fiber': 0.4},
+    'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4, 'fiber': 2.6},
+    'egg': {'calories': 155, 'protein': 13, 'carbs': 1.1, 'fat': 11, 'fiber': 0},
+    'oats': {'calories': 389, 'protein': 17, 'carbs': 66, 'fat': 7, 'fiber': 10.6}
+}
+DEFAULT_NUTRITION = {'calories': 100, 'protein': 5, 'carbs': 15, 'fat': 3, 'fiber': 2}
+
+@lru_cache(maxsize=4096)
+def find_nutrition(food_name):
+    """Find nutrition for a lowercased food name (exact, then partial match)"""
+    nutrition = NUTRITION_DB.get(food_name)
+    if nutrition:
+        return nutrition
+    
+    # Find partial matches
+    for food, food_nutrition in NUTRITION_DB.items():
+        if food in food_name or food_name in food:
+            return food_nutrition
+    
+    return DEFAULT_NUTRITION
+
 @app.route('/api/nutrition/lookup', methods=['POST'])
 def nutrition_lookup():
     try:
         data = request.get_json()
         food_name = data.get('food', '').lower()
         
-        # Sample nutrition database (in production, use a real API like USDA)
-        nutrition_db = {
-            'banana': {'calories': 105, 'protein': 1.3, 'carbs': 27, 'fat': 0.3, 'fiber': 3.1},
-            'apple': {'calories': 95, 'protein': 0.5, 'carbs': 25, 'fat': 0.3, 'fiber': 4.4},
-            'chicken breast': {'calories': 165, 'protein': 31, 'carbs': 0, 'fat': 3.6, 'fiber': 0},
-            'salmon': {'calories': 208, 'protein': 22, 'carbs': 0, 'fat': 12, 'fiber': 0},
-            'rice': {'calories': 130, 'protein': 2.7, 'carbs': 28, 'fat': 0.3, 'fiber': 0.4},
-            'broccoli': {'calories': 34, 'protein': 2.8, 'carbs': 7, 'fat': 0.4, 'fiber': 2.6},
-            'egg': {'calories': 155, 'protein': 13, 'carbs': 1.1, 'fat': 11, 'fiber': 0},
-            'oats': {'calories': 389, 'protein': 17, 'carbs': 66, 'fat': 7, 'fiber': 10.6}
-        }
-        
-        # Find closest match
-        nutrition = nutrition_db.get(food_name)
-        if not nutrition:
-            # Find partial matches
-            for food, data in nutrition_db.items():
-                if food in food_name or food_name in food:
-                    nutrition = data
-                    break
-        
-        if not nutrition:
-            nutrition = {'calories': 100, 'protein': 5, 'carbs': 15, 'fat': 3, 'fiber': 2}
+        nutrition = find_nutrition(food_name)
         
         return jsonify({
             'success': True,
@@ -570,7 +696,7 @@ def log_meal():
         db.session.commit()
         
         # Check for achievements
-        check_meal_achievements(user_id)
+        ACHIEVEMENT_EXECUTOR.submit(check_meal_achievements_in_background, user_id)
         
         return jsonify({
             'success': True,
@@ -586,11 +712,13 @@ def log_meal():
 def get_todays_meals():
     try:
         user_id = get_jwt_identity()
-        today = datetime.utcnow().date()
+        day_start, day_end = utc_day_bounds()
         
+        # Half-open range on the raw column so the (user_id, logged_at) index is used
         meals = MealLog.query.filter(
             MealLog.user_id == user_id,
-            db.func.date(MealLog.logged_at) == today
+            MealLog.logged_at >= day_start,
+            MealLog.logged_at < day_end
         ).all()
         
         total_calories = sum(meal.calories or 0 for meal in meals)
@@ -653,61 +781,84 @@ def chat():
 
 # ===== RECIPE SEARCH ROUTES =====
 
+# Sample recipe database
+RECIPES = [
+    {
+        'id': 'protein-bowl',
+        'name': 'High-Protein Power Bowl',
+        'description': 'Quinoa bowl with grilled chicken, roasted vegetables, and tahini dressing',
+        'ingredients': ['quinoa', 'chicken', 'broccoli', 'sweet potato', 'tahini'],
+        'calories': 520,
+        'protein': 35,
+        'prep_time': 25,
+        'difficulty': 'medium',
+        'image': 'https://images.unsplash.com/photo-1512621776951-a57141f2eefd?w=300&h=200&fit=crop'
+    },
+    {
+        'id': 'salmon-avocado',
+        'name': 'Baked Salmon with Avocado Salsa',
+        'description': 'Heart-healthy omega-3 rich salmon with fresh avocado salsa',
+        'ingredients': ['salmon', 'avocado', 'tomato', 'lime', 'cilantro'],
+        'calories': 380,
+        'protein': 28,
+        'prep_time': 20,
+        'difficulty': 'easy',
+        'image': 'https://images.unsplash.com/photo-1467003909585-2f8a72700288?w=300&h=200&fit=crop'
+    },
+    {
+        'id': 'veggie-stir-fry',
+        'name': 'Colorful Vegetable Stir-fry',
+        'description': 'Nutrient-packed mixed vegetables with ginger-soy sauce',
+        'ingredients': ['broccoli', 'bell pepper', 'carrot', 'ginger', 'soy sauce'],
+        'calories': 220,
+        'protein': 12,
+        'prep_time': 15,
+        'difficulty': 'easy',
+        'image': 'https://images.unsplash.com/photo-1512058564366-18510be2db19?w=300&h=200&fit=crop'
+    }
+]
+
+def singular_ingredient(name):
+    """Strip simple English plurals from each word ('cherry tomatoes' -> 'cherry tomato')"""
+    words = []
+    for word in name.split():
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 3 and word.endswith('oes'):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+            word = word[:-1]
+        words.append(word)
+    return ' '.join(words)
+
+def recipe_ingredient_tokens(ingredients):
+    """Lowercased ingredients plus their individual words ('bell pepper' -> 'bell', 'pepper')"""
+    tokens = set()
+    for ingredient in ingredients:
+        ingredient = singular_ingredient(ingredient.lower())
+        tokens.add(ingredient)
+        tokens.update(ingredient.split())
+    return frozenset(tokens)
+
+# Ingredient sets are precomputed once so filtering is a set intersection per recipe
+RECIPE_INGREDIENT_SETS = [(recipe, recipe_ingredient_tokens(recipe['ingredients'])) for recipe in RECIPES]
+
 @app.route('/api/recipes/search', methods=['POST'])
 def search_recipes():
     try:
         data = request.get_json()
         ingredients = data.get('ingredients', '')
         
-        # Sample recipe database
-        recipes = [
-            {
-                'id': 'protein-bowl',
-                'name': 'High-Protein Power Bowl',
-                'description': 'Quinoa bowl with grilled chicken, roasted vegetables, and tahini dressing',
-                'ingredients': ['quinoa', 'chicken', 'broccoli', 'sweet potato', 'tahini'],
-                'calories': 520,
-                'protein': 35,
-                'prep_time': 25,
-                'difficulty': 'medium',
-                'image': 'https://images.unsplash.com/photo-1512621776951-a57141f2eefd?w=300&h=200&fit=crop'
-            },
-            {
-                'id': 'salmon-avocado',
-                'name': 'Baked Salmon with Avocado Salsa',
-                'description': 'Heart-healthy omega-3 rich salmon with fresh avocado salsa',
-                'ingredients': ['salmon', 'avocado', 'tomato', 'lime', 'cilantro'],
-                'calories': 380,
-                'protein': 28,
-                'prep_time': 20,
-                'difficulty': 'easy',
-                'image': 'https://images.unsplash.com/photo-1467003909585-2f8a72700288?w=300&h=200&fit=crop'
-            },
-            {
-                'id': 'veggie-stir-fry',
-                'name': 'Colorful Vegetable Stir-fry',
-                'description': 'Nutrient-packed mixed vegetables with ginger-soy sauce',
-                'ingredients': ['broccoli', 'bell pepper', 'carrot', 'ginger', 'soy sauce'],
-                'calories': 220,
-                'protein': 12,
-                'prep_time': 15,
-                'difficulty': 'easy',
-                'image': 'https://images.unsplash.com/photo-1512058564366-18510be2db19?w=300&h=200&fit=crop'
-            }
-        ]
-        
         # Filter recipes based on ingredients
-        ingredient_list = [ing.strip().lower() for ing in ingredients.split(',')]
-        filtered_recipes = []
-        
-        for recipe in recipes:
-            # Check if any ingredient matches
-            if any(ing in ' '.join(recipe['ingredients']).lower() for ing in ingredient_list):
-                filtered_recipes.append(recipe)
+        user_ingredients = frozenset(singular_ingredient(ing.strip().lower()) for ing in ingredients.split(','))
+        filtered_recipes = [
+            recipe for recipe, ingredient_set in RECIPE_INGREDIENT_SETS
+            if user_ingredients & ingredient_set
+        ]
         
         # If no matches, return all recipes
         if not filtered_recipes:
-            filtered_recipes = recipes
+            filtered_recipes = RECIPES
         
         return jsonify({
             'success': True,
@@ -778,97 +929,137 @@ def track_wellness():
 
 # ===== COMMUNITY ROUTES =====
 
+# Sample leaderboard data (in production, calculate from actual user data)
+LEADERBOARD = [
+    {'rank': 1, 'username': 'HealthHero123', 'score': 2850, 'streak': 28, 'badge': '🏆'},
+    {'rank': 2, 'username': 'NutritioNinja', 'score': 2650, 'streak': 21, 'badge': '🥈'},
+    {'rank': 3, 'username': 'WellnessWarrior', 'score': 2480, 'streak': 18, 'badge': '🥉'},
+    {'rank': 4, 'username': 'FitnessFanatic', 'score': 2320, 'streak': 15, 'badge': '⭐'},
+    {'rank': 5, 'username': 'HealthyHabits', 'score': 2180, 'streak': 12, 'badge': '⭐'},
+    {'rank': 6, 'username': 'VeggieLover99', 'score': 2050, 'streak': 9, 'badge': '⭐'},
+    {'rank': 7, 'username': 'ProteinPowerFan', 'score': 1920, 'streak': 7, 'badge': '⭐'},
+    {'rank': 8, 'username': 'CleanEating101', 'score': 1850, 'streak': 5, 'badge': '⭐'}
+]
+
+# The leaderboard is static, so its JSON is serialized once at import;
+# only the updated_at timestamp changes
+LEADERBOARD_JSON = app.json.dumps(LEADERBOARD)
+LEADERBOARD_CACHE_SECONDS = 60
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+@lru_cache(maxsize=1)
+def leaderboard_body(time_bucket):
+    """Serialized leaderboard; updated_at is the start of the LEADERBOARD_CACHE_SECONDS
+    bucket, so the body (and its ETag) stays the same while clients may cache it"""
+    updated_at = UNIX_EPOCH + timedelta(seconds=time_bucket * LEADERBOARD_CACHE_SECONDS)
+    return (
+        '{"leaderboard":' + LEADERBOARD_JSON
+        + ',"success":true,"updated_at":' + app.json.dumps(updated_at.isoformat()) + '}'
+    )
+
 @app.route('/api/community/leaderboard', methods=['GET'])
 def get_leaderboard():
-    try:
-        # Sample leaderboard data (in production, calculate from actual user data)
-        leaderboard = [
-            {'rank': 1, 'username': 'HealthHero123', 'score': 2850, 'streak': 28, 'badge': '🏆'},
-            {'rank': 2, 'username': 'NutritioNinja', 'score': 2650, 'streak': 21, 'badge': '🥈'},
-            {'rank': 3, 'username': 'WellnessWarrior', 'score': 2480, 'streak': 18, 'badge': '🥉'},
-            {'rank': 4, 'username': 'FitnessFanatic', 'score': 2320, 'streak': 15, 'badge': '⭐'},
-            {'rank': 5, 'username': 'HealthyHabits', 'score': 2180, 'streak': 12, 'badge': '⭐'},
-            {'rank': 6, 'username': 'VeggieLover99', 'score': 2050, 'streak': 9, 'badge': '⭐'},
-            {'rank': 7, 'username': 'ProteinPowerFan', 'score': 1920, 'streak': 7, 'badge': '⭐'},
-            {'rank': 8, 'username': 'CleanEating101', 'score': 1850, 'streak': 5, 'badge': '⭐'}
-        ]
-        
-        return jsonify({
-            'success': True,
-            'leaderboard': leaderboard,
-            'updated_at': datetime.utcnow().isoformat()
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+    time_bucket = int((datetime.utcnow() - UNIX_EPOCH).total_seconds() // LEADERBOARD_CACHE_SECONDS)
+    return app.response_class(leaderboard_body(time_bucket), mimetype='application/json')
+
+CHALLENGES_CACHE_SECONDS = 300
+
+@lru_cache(maxsize=1)
+def weekly_challenges_body(time_bucket):
+    """Serialized weekly challenges; rebuilt once per CHALLENGES_CACHE_SECONDS bucket"""
+    # One PRNG draw sliced into the four progress values: 2-bit fields for the
+    # 4-value ranges, 8-bit fields mod 3 (negligible bias) for the 3-value ones
+    bits = random.getrandbits(20)
+    now = datetime.utcnow()
+    expires_at = (now + timedelta(days=4)).isoformat()
+    challenges = [
+        {
+            'id': 'hydration-hero',
+            'title': '💧 Hydration Hero',
+            'description': 'Drink 8+ glasses of water daily for 7 days',
+            'progress': 3 + (bits & 3),
+            'target': 7,
+            'reward': '50 points + Hydration Badge',
+            'category': 'wellness',
+            'expires_at': expires_at
+        },
+        {
+            'id': 'veggie-champion',
+            'title': '🥬 Veggie Champion',
+            'description': 'Eat 5+ servings of vegetables daily',
+            'progress': 2 + ((bits >> 2) & 3),
+            'target': 7,
+            'reward': '75 points + Veggie Badge',
+            'category': 'nutrition',
+            'expires_at': expires_at
+        },
+        {
+            'id': 'protein-power',
+            'title': '🥩 Protein Power',
+            'description': 'Meet your daily protein goals for 5 days',
+            'progress': 2 + ((bits >> 4) & 0xFF) % 3,
+            'target': 5,
+            'reward': '60 points + Protein Badge',
+            'category': 'nutrition',
+            'expires_at': expires_at
+        },
+        {
+            'id': 'meal-master',
+            'title': '🍽️ Meal Master',
+            'description': 'Log 3 complete meals daily for 7 days',
+            'progress': 4 + ((bits >> 12) & 0xFF) % 3,
+            'target': 7,
+            'reward': '80 points + Meal Master Badge',
+            'category': 'tracking',
+            'expires_at': expires_at
+        }
+    ]
+    
+    return app.json.dumps({
+        'success': True,
+        'challenges': challenges,
+        'updated_at': now.isoformat()
+    })
 
 @app.route('/api/challenges/weekly', methods=['GET'])
 def get_weekly_challenges():
     try:
-        challenges = [
-            {
-                'id': 'hydration-hero',
-                'title': '💧 Hydration Hero',
-                'description': 'Drink 8+ glasses of water daily for 7 days',
-                'progress': random.randint(3, 6),
-                'target': 7,
-                'reward': '50 points + Hydration Badge',
-                'category': 'wellness',
-                'expires_at': (datetime.utcnow() + timedelta(days=4)).isoformat()
-            },
-            {
-                'id': 'veggie-champion',
-                'title': '🥬 Veggie Champion',
-                'description': 'Eat 5+ servings of vegetables daily',
-                'progress': random.randint(2, 5),
-                'target': 7,
-                'reward': '75 points + Veggie Badge',
-                'category': 'nutrition',
-                'expires_at': (datetime.utcnow() + timedelta(days=4)).isoformat()
-            },
-            {
-                'id': 'protein-power',
-                'title': '🥩 Protein Power',
-                'description': 'Meet your daily protein goals for 5 days',
-                'progress': random.randint(2, 4),
-                'target': 5,
-                'reward': '60 points + Protein Badge',
-                'category': 'nutrition',
-                'expires_at': (datetime.utcnow() + timedelta(days=4)).isoformat()
-            },
-            {
-                'id': 'meal-master',
-                'title': '🍽️ Meal Master',
-                'description': 'Log 3 complete meals daily for 7 days',
-                'progress': random.randint(4, 6),
-                'target': 7,
-                'reward': '80 points + Meal Master Badge',
-                'category': 'tracking',
-                'expires_at': (datetime.utcnow() + timedelta(days=4)).isoformat()
-            }
-        ]
-        
-        return jsonify({
-            'success': True,
-            'challenges': challenges,
-            'updated_at': datetime.utcnow().isoformat()
-        })
+        time_bucket = int(datetime.utcnow().timestamp() // CHALLENGES_CACHE_SECONDS)
+        return app.response_class(weekly_challenges_body(time_bucket), mimetype='application/json')
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # ===== SUSTAINABILITY ROUTES =====
 
+# Calculate sustainability based on meal choices: keyword -> tag
+SUSTAINABILITY_KEYWORD_TAGS = {
+    **{keyword: 'plant' for keyword in ('vegetable', 'fruit', 'grain', 'legume', 'quinoa', 'salad', 'tofu')},
+    **{keyword: 'sustainable' for keyword in ('local', 'organic', 'seasonal', 'plant')}
+}
+SUSTAINABILITY_KEYWORD_RE = re.compile('|'.join(
+    re.escape(keyword) for keyword in sorted(SUSTAINABILITY_KEYWORD_TAGS, key=len, reverse=True)
+))
+
+@lru_cache(maxsize=1024)
+def sustainability_metrics(plant_based_count, sustainable_count, total_meals):
+    """Return (score, carbon_footprint, water_usage) for the given meal counts"""
+    plant_score = (plant_based_count / total_meals) * 60
+    sustainable_score = (sustainable_count / total_meals) * 40
+    sustainability_score = round(plant_score + sustainable_score)
+    
+    # Environmental impact: 2.5 kg CO2 and 1000 L water per day baseline
+    carbon_footprint = round(max(0.5, 2.5 - sustainability_score * 0.02), 1)
+    water_usage = round(max(200, 1000 - sustainability_score * 8))
+    
+    return sustainability_score, carbon_footprint, water_usage
+
 @app.route('/api/sustainability/score', methods=['POST'])
 def calculate_sustainability_score():
     try:
         data = request.get_json()
         meals = data.get('meals', [])
         
-        # Calculate sustainability based on meal choices
-        plant_based_keywords = ['vegetable', 'fruit', 'grain', 'legume', 'quinoa', 'salad', 'tofu']
-        sustainable_keywords = ['local', 'organic', 'seasonal', 'plant']
-        
         total_meals = len(meals)
         if total_meals == 0:
             return jsonify({'success': False, 'message': 'No meals provided'}), 400
@@ -876,26 +1067,19 @@ def calculate_sustainability_score():
         plant_based_count = 0
         sustainable_count = 0
         
-        for meal in meals:
-            meal_name = meal.get('name', '').lower()
-            if any(keyword in meal_name for keyword in plant_based_keywords):
-                plant_based_count += 1
-            if any(keyword in meal_name for keyword in sustainable_keywords):
-                sustainable_count += 1
-        
-        # Calculate scores
-        plant_score = (plant_based_count / total_meals) * 60
-        sustainable_score = (sustainable_count / total_meals) * 40
-        sustainability_score = round(plant_score + sustainable_score)
-        
-        # Calculate environmental impact
-        base_carbon = 2.5  # kg CO2 per day
-        carbon_reduction = sustainability_score * 0.02
-        carbon_footprint = round(max(0.5, base_carbon - carbon_reduction), 1)
-        
-        base_water = 1000  # liters per day
-        water_reduction = sustainability_score * 8
-        water_usage = round(max(200, base_water - water_reduction))
+        # Tag each distinct meal name once (one regex pass) and weight by how often it occurs
+        name_counts = Counter(meal.get('name', '').lower() for meal in meals)
+        for meal_name, count in name_counts.items():
+            tags = {SUSTAINABILITY_KEYWORD_TAGS[m.group()] for m in SUSTAINABILITY_KEYWORD_RE.finditer(meal_name)}
+            if 'plant' in tags:
+                plant_based_count += count
+            if 'sustainable' in tags:
+                sustainable_count += count
+        
+        # Calculate scores and environmental impact
+        sustainability_score, carbon_footprint, water_usage = sustainability_metrics(
+            plant_based_count, sustainable_count, total_meals
+        )
         
         # Generate recommendations
         recommendations = []
@@ -937,6 +1121,136 @@ def calculate_sustainability_score():
 
 # ===== GROCERY LIST ROUTES =====
 
+def build_grocery_categories(vegan, gluten_free):
+    """Grocery list categories adjusted for dietary restrictions"""
+    # Generate grocery list based on nutritional needs
+    grocery_list = {
+        'proteins': [
+            'Chicken breast (1kg)',
+            'Salmon fillet (500g)',
+            'Eggs (12 pack)',
+            'Greek yogurt (750g)',
+            'Lean ground turkey (500g)',
+            'Cottage cheese (500g)'
+        ],
+        'vegetables': [
+            'Mixed leafy greens (300g)',
+            'Broccoli (400g)',
+            'Bell peppers (4 pieces)',
+            'Tomatoes (750g)',
+            'Carrots (500g)',
+            'Onions (3 pieces)',
+            'Garlic (1 bulb)'
+        ],
+        'fruits': [
+            'Bananas (8 pieces)',
+            'Apples (6 pieces)',
+            'Mixed berries (300g)',
+            'Avocados (4 pieces)',
+            'Oranges (6 pieces)',
+            'Lemons (3 pieces)'
+        ],
+        'grains': [
+            'Brown rice (1kg)',
+            'Quinoa (500g)',
+            'Whole grain bread (2 loaves)',
+            'Oats (750g)',
+            'Whole wheat pasta (500g)'
+        ],
+        'dairy': [
+            'Milk (2L)',
+            'Low-fat cheese (300g)',
+            'Plain Greek yogurt (1kg)'
+        ],
+        'pantry': [
+            'Extra virgin olive oil (500ml)',
+            'Mixed nuts (250g)',
+            'Almond butter (300g)',
+            'Raw honey (250g)',
+            'Herbs & spices variety pack',
+            'Canned beans (3 cans)'
+        ]
+    }
+    
+    # Adjust for dietary restrictions
+    if vegan:
+        grocery_list['proteins'] = [
+            'Tofu (600g)',
+            'Tempeh (400g)',
+            'Lentils (1kg)',
+            'Chickpeas (3 cans)',
+            'Nuts & seeds mix (500g)',
+            'Nutritional yeast (200g)'
+        ]
+        del grocery_list['dairy']
+        grocery_list['plant_milk'] = [
+            'Almond milk (2L)',
+            'Oat milk (1L)',
+            'Coconut yogurt (500g)'
+        ]
+    
+    if gluten_free:
+        grocery_list['grains'] = [
+            'Brown rice (1kg)',
+            'Quinoa (500g)',
+            'Gluten-free bread (2 loaves)',
+            'Gluten-free oats (750g)',
+            'Rice noodles (500g)'
+        ]
+    
+    return grocery_list
+
+# All four (vegan, gluten_free) variants, pre-serialized once at import
+GROCERY_CATEGORIES_JSON = {
+    (vegan, gluten_free): app.json.dumps(build_grocery_categories(vegan, gluten_free))
+    for vegan in (False, True)
+    for gluten_free in (False, True)
+}
+
+# Sustainability tips
+GROCERY_SUSTAINABILITY_TIPS_JSON = app.json.dumps([
+    '🌱 Choose organic produce when budget allows',
+    '🌍 Buy local and seasonal fruits and vegetables',
+    '♻️ Bring reusable bags and containers',
+    '📋 Check expiry dates and buy only what you need',
+    '💰 Compare prices and look for bulk discounts',
+    '🚗 Plan your shopping to reduce trips and emissions',
+    '🥫 Choose products with minimal packaging'
+])
+
+def parse_dietary_restrictions(value):
+    """Restriction names from a stored value: a JSON list, a JSON string or legacy free text"""
+    if not value:
+        return frozenset()
+    try:
+        restrictions = json.loads(value)
+    except ValueError:
+        restrictions = value.split(',')
+    if not isinstance(restrictions, list):
+        restrictions = str(restrictions).split(',')
+    return frozenset(str(name).strip().lower() for name in restrictions if str(name).strip())
+
+def user_dietary_restrictions(user_id):
+    """Return a user's dietary restrictions as a frozenset (one column, no ORM object)"""
+    return parse_dietary_restrictions(db.session.execute(
+        db.select(UserProfile.dietary_restrictions).filter_by(user_id=user_id)
+    ).scalar())
+
+def grocery_list_fragments(categories_json, estimated_cost_json, days_json, generated_at_json):
+    """Yield the grocery list response body in pre-serialized pieces"""
+    # Keys in sorted order, matching app.json.dumps output
+    yield '{"generated_at":'
+    yield generated_at_json
+    yield ',"grocery_list":{"categories":'
+    yield categories_json
+    yield ',"days":'
+    yield days_json
+    yield ',"estimated_cost":'
+    yield estimated_cost_json
+    yield '},"success":true,"sustainability_tips":'
+    yield GROCERY_SUSTAINABILITY_TIPS_JSON
+    yield '}'
+
 @app.route('/api/grocery/generate-list', methods=['POST'])
 @jwt_required()
 def generate_grocery_list():
@@ -946,116 +1260,45 @@ def generate_grocery_list():
         days = data.get('days', 7)
         
         # Get user's dietary restrictions
-        profile = UserProfile.query.filter_by(user_id=user_id).first()
-        dietary_restrictions = []
-        if profile and profile.dietary_restrictions:
-            dietary_restrictions = json.loads(profile.dietary_restrictions)
-        
-        # Generate grocery list based on nutritional needs
-        grocery_list = {
-            'proteins': [
-                'Chicken breast (1kg)',
-                'Salmon fillet (500g)',
-                'Eggs (12 pack)',
-                'Greek yogurt (750g)',
-                'Lean ground turkey (500g)',
-                'Cottage cheese (500g)'
-            ],
-            'vegetables': [
-                'Mixed leafy greens (300g)',
-                'Broccoli (400g)',
-                'Bell peppers (4 pieces)',
-                'Tomatoes (750g)',
-                'Carrots (500g)',
-                'Onions (3 pieces)',
-                'Garlic (1 bulb)'
-            ],
-            'fruits': [
-                'Bananas (8 pieces)',
-                'Apples (6 pieces)',
-                'Mixed berries (300g)',
-                'Avocados (4 pieces)',
-                'Oranges (6 pieces)',
-                'Lemons (3 pieces)'
-            ],
-            'grains': [
-                'Brown rice (1kg)',
-                'Quinoa (500g)',
-                'Whole grain bread (2 loaves)',
-                'Oats (750g)',
-                'Whole wheat pasta (500g)'
-            ],
-            'dairy': [
-                'Milk (2L)',
-                'Low-fat cheese (300g)',
-                'Plain Greek yogurt (1kg)'
-            ],
-            'pantry': [
-                'Extra virgin olive oil (500ml)',
-                'Mixed nuts (250g)',
-                'Almond butter (300g)',
-                'Raw honey (250g)',
-                'Herbs & spices variety pack',
-                'Canned beans (3 cans)'
-            ]
-        }
-        
-        # Adjust for dietary restrictions
-        if 'vegan' in dietary_restrictions:
-            grocery_list['proteins'] = [
-                'Tofu (600g)',
-                'Tempeh (400g)',
-                'Lentils (1kg)',
-                'Chickpeas (3 cans)',
-                'Nuts & seeds mix (500g)',
-                'Nutritional yeast (200g)'
-            ]
-            del grocery_list['dairy']
-            grocery_list['plant_milk'] = [
-                'Almond milk (2L)',
-                'Oat milk (1L)',
-                'Coconut yogurt (500g)'
-            ]
-        
-        if 'gluten-free' in dietary_restrictions:
-            grocery_list['grains'] = [
-                'Brown rice (1kg)',
-                'Quinoa (500g)',
-                'Gluten-free bread (2 loaves)',
-                'Gluten-free oats (750g)',
-                'Rice noodles (500g)'
-            ]
+        dietary_restrictions = user_dietary_restrictions(user_id)
         
-        # Sustainability tips
-        sustainability_tips = [
-            '🌱 Choose organic produce when budget allows',
-            '🌍 Buy local and seasonal fruits and vegetables',
-            '♻️ Bring reusable bags and containers',
-            '📋 Check expiry dates and buy only what you need',
-            '💰 Compare prices and look for bulk discounts',
-            '🚗 Plan your shopping to reduce trips and emissions',
-            '🥫 Choose products with minimal packaging'
-        ]
+        variant = ('vegan' in dietary_restrictions, 'gluten-free' in dietary_restrictions)
         
         # Estimate cost
         estimated_cost = f"${random.randint(55, 85)}-{random.randint(85, 120)} USD"
         
-        return jsonify({
-            'success': True,
-            'grocery_list': {
-                'categories': grocery_list,
-                'estimated_cost': estimated_cost,
-                'days': days
-            },
-            'sustainability_tips': sustainability_tips,
-            'generated_at': datetime.utcnow().isoformat()
-        })
+        # Only the small dynamic fields are serialized per request; the body is
+        # streamed fragment by fragment instead of concatenated into one string
+        dynamic_fields = (
+            app.json.dumps(estimated_cost),
+            app.json.dumps(days),
+            app.json.dumps(datetime.utcnow().isoformat())
+        )
+        return app.response_class(
+            grocery_list_fragments(GROCERY_CATEGORIES_JSON[variant], *dynamic_fields),
+            mimetype='application/json'
+        )
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 # ===== VOICE PROCESSING ROUTES =====
 
+# Prefix prepended to the bot's reply per voice language ('en' needs none)
+VOICE_LANGUAGE_PREFIXES = {
+    'es': "Entiendo tu pregunta sobre nutrición. ",
+    'fr': "Je comprends votre question sur la nutrition. ",
+    'am': "የእርስዎን የተመጣጠነ ምግብ ጥያቄ ተረድቻለሁ። "
+}
+
+# Longer transcripts bypass the reply cache
+VOICE_CACHE_MAX_LENGTH = 200
+
+@lru_cache(maxsize=2048)
+def cached_voice_response(text):
+    """Memoized bot reply for a normalized (stripped, lowercased) voice query"""
+    return ai_bot.generate_response(text)
+
 @app.route('/api/voice/process', methods=['POST'])
 def process_voice():
     try:
@@ -1063,18 +1306,17 @@ def process_voice():
         text = data.get('text', '')
         language = data.get('language', 'en')
         
-        # Process the voice command
-        response = ai_bot.generate_response(text)
+        # Process the voice command; short commands repeat a lot, so serve them
+        # from the cache (language and intent detection ignore case anyway)
+        key = text.strip().lower()
+        if len(key) <= VOICE_CACHE_MAX_LENGTH:
+            response = cached_voice_response(key)
+        else:
+            response = ai_bot.generate_response(text)
         
         # Add language-specific processing if needed
-        language_responses = {
-            'en': response,
-            'es': f"Entiendo tu pregunta sobre nutrición. {response}",
-            'fr': f"Je comprends votre question sur la nutrition. {response}",
-            'am': f"የእርስዎን የተመጣጠነ ምግብ ጥያቄ ተረድቻለሁ። {response}"
-        }
-        
-        processed_response = language_responses.get(language, response)
+        prefix = VOICE_LANGUAGE_PREFIXES.get(language)
+        processed_response = prefix + response if prefix else response
         
         return jsonify({
             'success': True,
@@ -1089,6 +1331,20 @@ def process_voice():
 
 # ===== DONATION ROUTES =====
 
+# Only the randomly chosen template gets formatted per donation
+DONATION_IMPACT_TEMPLATES = (
+    "Your ${amount:.2f} donation can provide {meals_provided} nutritious meals!",
+    "You're helping feed {people_helped} people for a day!",
+    "Your generosity supports {meals_provided} meals for families in need!"
+)
+
+@lru_cache(maxsize=4096)
+def donation_impact(amount):
+    """Return (meals_provided, people_helped); donations cluster on round amounts"""
+    meals_provided = int(amount / 2.5)  # $2.5 per meal
+    people_helped = max(1, int(meals_provided / 3))  # 3 meals per person per day
+    return meals_provided, people_helped
+
 @app.route('/api/donation/contribute', methods=['POST'])
 def calculate_donation_impact():
     try:
@@ -1100,16 +1356,11 @@ def calculate_donation_impact():
             return jsonify({'success': False, 'message': 'Invalid donation amount'}), 400
         
         # Calculate impact (rough estimates)
-        meals_provided = int(amount / 2.5)  # $2.5 per meal
-        people_helped = max(1, int(meals_provided / 3))  # 3 meals per person per day
+        meals_provided, people_helped = donation_impact(amount)
         
-        impact_messages = [
-            f"Your ${amount:.2f} donation can provide {meals_provided} nutritious meals!",
-            f"You're helping feed {people_helped} people for a day!",
-            f"Your generosity supports {meals_provided} meals for families in need!"
-        ]
-        
-        selected_message = random.choice(impact_messages)
+        selected_message = random.choice(DONATION_IMPACT_TEMPLATES).format(
+            amount=amount, meals_provided=meals_provided, people_helped=people_helped
+        )
         
         return jsonify({
             'success': True,
@@ -1133,60 +1384,150 @@ def calculate_donation_impact():
 
 # ===== UTILITY FUNCTIONS =====
 
+# Achievement name -> id, filled by init_sample_data at startup
+ACHIEVEMENT_IDS = {}
+
+def utc_day_bounds():
+    """Return (start, end) datetimes covering the current UTC day"""
+    day_start = datetime.combine(datetime.utcnow().date(), time.min)
+    return day_start, day_start + timedelta(days=1)
+
 def check_meal_achievements(user_id):
     """Check and award meal-related achievements"""
     try:
-        today = datetime.utcnow().date()
-        meals_today = MealLog.query.filter(
+        achievement_id = ACHIEVEMENT_IDS.get('Daily Meal Master')
+        if achievement_id is None:
+            return
+        
+        day_start, day_end = utc_day_bounds()
+        
+        # Half-open range predicates keep ix_meal_log_user_logged_at usable (older
+        # databases get it from ensure_indexes at startup), and LIMIT 3 stops the
+        # index scan as soon as the threshold is reached
+        todays_meals = db.select(MealLog.id).where(
             MealLog.user_id == user_id,
-            db.func.date(MealLog.logged_at) == today
-        ).count()
-        
-        # Check for daily meal achievement
-        if meals_today >= 3:
-            existing_achievement = UserAchievement.query.join(Achievement).filter(
-                UserAchievement.user_id == user_id,
-                Achievement.name == 'Daily Meal Master',
-                db.func.date(UserAchievement.earned_at) == today
-            ).first()
-            
-            if not existing_achievement:
-                # Award achievement
-                achievement = Achievement.query.filter_by(name='Daily Meal Master').first()
-                if achievement:
-                    user_achievement = UserAchievement(
-                        user_id=user_id,
-                        achievement_id=achievement.id
-                    )
-                    db.session.add(user_achievement)
-                    db.session.commit()
+            MealLog.logged_at >= day_start,
+            MealLog.logged_at < day_end
+        ).limit(3).subquery()
+        meals_today = db.select(db.func.count()).select_from(todays_meals).scalar_subquery()
+        
+        already_awarded = db.exists().where(
+            UserAchievement.user_id == user_id,
+            UserAchievement.achievement_id == achievement_id,
+            UserAchievement.earned_at >= day_start,
+            UserAchievement.earned_at < day_end
+        )
+        
+        # Daily meal achievement: a single INSERT ... SELECT that only inserts
+        # when 3+ meals were logged today and it hasn't been awarded yet
+        award_daily_meal_master = db.insert(UserAchievement).from_select(
+            ['user_id', 'achievement_id', 'earned_at'],
+            db.select(
+                db.literal(user_id),
+                db.literal(achievement_id),
+                db.literal(datetime.utcnow(), db.DateTime)
+            ).where(
+                meals_today >= 3,
+                ~already_awarded
+            )
+        )
+        
+        result = db.session.execute(award_daily_meal_master)
+        if result.rowcount:
+            db.session.commit()
                     
     except Exception as e:
         print(f"Achievement check error: {e}")
 
+# Achievement checks run off the request path so logging a meal doesn't wait on
+# the extra commit
+ACHIEVEMENT_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='achievements')
+
+def check_meal_achievements_in_background(user_id):
+    """Run check_meal_achievements in its own app context (and so its own session)"""
+    with app.app_context():
+        check_meal_achievements(user_id)
+
+SEED_ACHIEVEMENTS = (
+    {'name': 'Daily Meal Master', 'description': 'Log 3 meals in one day', 'badge_emoji': '🍽️', 'points': 50, 'category': 'meals'},
+    {'name': 'Hydration Hero', 'description': 'Meet daily water goal', 'badge_emoji': '💧', 'points': 30, 'category': 'hydration'},
+    {'name': 'Weekly Warrior', 'description': '7-day tracking streak', 'badge_emoji': '🔥', 'points': 100, 'category': 'consistency'},
+    {'name': 'Protein Power', 'description': 'Meet protein goals for 5 days', 'badge_emoji': '🥩', 'points': 75, 'category': 'nutrition'},
+    {'name': 'Veggie Champion', 'description': 'Eat 5+ servings of vegetables daily', 'badge_emoji': '🥬', 'points': 60, 'category': 'nutrition'}
+)
+
+# db.create_all() only creates missing tables, so indexes added to existing
+# tables are created here (unique ones after removing rows that would violate them).
+# Names match the ones the models declare, so fresh databases skip them.
+INDEX_MIGRATIONS = (
+    # calculate_nutrition upserts on user_id; keep the oldest row, which is the
+    # one the old select-then-update code kept up to date
+    'DELETE FROM user_profile WHERE id NOT IN (SELECT MIN(id) FROM user_profile GROUP BY user_id)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_user_profile_user_id ON user_profile (user_id)',
+    # Seeding upserts on achievement name; point earned badges at the first row
+    # of each name before dropping the duplicates
+    '''UPDATE user_achievement SET achievement_id = (
+        SELECT MIN(keep.id) FROM achievement AS keep JOIN achievement AS dup ON keep.name = dup.name
+        WHERE dup.id = user_achievement.achievement_id
+    ) WHERE achievement_id IN (SELECT id FROM achievement)''',
+    'DELETE FROM achievement WHERE id NOT IN (SELECT MIN(id) FROM achievement GROUP BY name)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_achievement_name ON achievement (name)',
+    # Composite and foreign key indexes used by the user_id / logged_at range queries
+    'CREATE INDEX IF NOT EXISTS ix_meal_log_user_logged_at ON meal_log (user_id, logged_at)',
+    'CREATE INDEX IF NOT EXISTS ix_nutrition_plan_user_id ON nutrition_plan (user_id)',
+    'CREATE INDEX IF NOT EXISTS ix_user_achievement_user_id ON user_achievement (user_id)',
+    'CREATE INDEX IF NOT EXISTS ix_user_achievement_achievement_id ON user_achievement (achievement_id)',
+    'CREATE INDEX IF NOT EXISTS ix_community_post_user_id ON community_post (user_id)',
+)
+
+def ensure_indexes():
+    """Bring databases created by earlier versions up to the current indexes"""
+    with db.engine.begin() as connection:
+        for statement in INDEX_MIGRATIONS:
+            connection.execute(db.text(statement))
+
 def init_sample_data():
     """Initialize sample achievements and data"""
     try:
-        # Create sample achievements if they don't exist
-        achievements = [
-            {'name': 'Daily Meal Master', 'description': 'Log 3 meals in one day', 'badge_emoji': '🍽️', 'points': 50, 'category': 'meals'},
-            {'name': 'Hydration Hero', 'description': 'Meet daily water goal', 'badge_emoji': '💧', 'points': 30, 'category': 'hydration'},
-            {'name': 'Weekly Warrior', 'description': '7-day tracking streak', 'badge_emoji': '🔥', 'points': 100, 'category': 'consistency'},
-            {'name': 'Protein Power', 'description': 'Meet protein goals for 5 days', 'badge_emoji': '🥩', 'points': 75, 'category': 'nutrition'},
-            {'name': 'Veggie Champion', 'description': 'Eat 5+ servings of vegetables daily', 'badge_emoji': '🥬', 'points': 60, 'category': 'nutrition'}
-        ]
-        
-        for ach_data in achievements:
-            existing = Achievement.query.filter_by(name=ach_data['name']).first()
-            if not existing:
-                achievement = Achievement(**ach_data)
-                db.session.add(achievement)
-        
+        # Create sample achievements if they don't exist: one
+        # INSERT ... ON CONFLICT DO NOTHING instead of a SELECT per row
+        db.session.execute(
+            sqlite_insert(Achievement).values(SEED_ACHIEVEMENTS).on_conflict_do_nothing(index_elements=['name'])
+        )
         db.session.commit()
         print("Sample data initialized successfully!")
         
     except Exception as e:
+        db.session.rollback()
         print(f"Error initializing sample data: {e}")
+    
+    # Achievement rows never change at runtime, so cache their ids by name.
+    # Loaded separately so the awards still work if seeding failed.
+    ACHIEVEMENT_IDS.update(db.session.execute(
+        db.select(Achievement.name, Achievement.id)
+        .where(Achievement.name.in_([achievement['name'] for achievement in SEED_ACHIEVEMENTS]))
+        .order_by(Achievement.id.desc())
+    ).all())
+
+# ===== RESPONSE CACHING =====
+
+# Endpoints whose GET responses are identical for every caller -> max-age in seconds
+CACHEABLE_ENDPOINTS = {
+    'api_health': 300,
+    'list_images': 60,
+    'get_leaderboard': LEADERBOARD_CACHE_SECONDS
+}
+
+@app.after_request
+def add_cache_headers(response):
+    """Add Cache-Control + ETag to shared GET responses and answer If-None-Match with 304"""
+    max_age = CACHEABLE_ENDPOINTS.get(request.endpoint)
+    if max_age and request.method == 'GET' and response.status_code == 200:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.add_etag()
+        response.make_conditional(request)
+    return response
 
 # ===== ERROR HANDLERS =====
 
@@ -1211,6 +1552,7 @@ def invalid_token_callback(error):
 # Initialize database for production
 with app.app_context():
     db.create_all()
+    ensure_indexes()
     init_sample_data()
 
 if __name__ == '__main__':
@@ -4,25 +4,37 @@ Hackathon 2025 - SDG 2 & SDG 3 Solution
 Supporting MySQL, MongoDB, and Firebase databases
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import os
-import json
+import re
+import csv
+import io
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 import hashlib
+import math
+import numbers
+import time
+import queue
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import chain
 from dotenv import load_dotenv
+from json_provider import ORJSONProvider
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Database imports
-import mysql.connector
-from pymongo import MongoClient
-import firebase_admin
-from firebase_admin import credentials, firestore
+# Database drivers are imported in initialize_databases so a deployment
+# only loads the one selected by DATABASE_TYPE
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)  # Enable cross-origin requests
 
 # Configuration
@@ -37,18 +49,150 @@ EDAMAM_APP_ID = os.getenv('EDAMAM_APP_ID', 'your_edamam_app_id')
 EDAMAM_API_KEY = os.getenv('EDAMAM_API_KEY', 'your_edamam_key')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'your_openai_key')
 
+# Shared HTTP session so external API calls reuse pooled keep-alive connections
+# instead of paying a TCP + TLS handshake per request
+http_session = requests.Session()
+http_session.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=32))
+
+# External API endpoints and headers, built once at import time
+NUTRITIONIX_URL = "https://trackapi.nutritionix.com/v2/natural/nutrients"
+NUTRITIONIX_HEADERS = {
+    'x-app-id': NUTRITIONIX_APP_ID,
+    'x-app-key': NUTRITIONIX_API_KEY,
+    'Content-Type': 'application/json'
+}
+CALORIE_NINJAS_URL = "https://api.calorieninjas.com/v1/nutrition"
+CALORIE_NINJAS_HEADERS = {
+    'X-Api-Key': os.getenv('CALORIE_NINJAS_API_KEY', 'YOUR_CALORIE_NINJAS_API_KEY')
+}
+HUGGING_FACE_QA_URL = "https://api-inference.huggingface.co/models/deepset/roberta-base-squad2"
+HUGGING_FACE_HEADERS = {"Authorization": f"Bearer {HUGGING_FACE_API_KEY}"}
+SPOONACULAR_FIND_BY_INGREDIENTS_URL = "https://api.spoonacular.com/recipes/findByIngredients"
+
+# Nutrition context for better question-answering results
+NUTRITION_QA_CONTEXT = """
+Nutrition is essential for good health. A balanced diet includes proteins, carbohydrates, 
+healthy fats, vitamins, and minerals. Daily calorie needs vary by age, gender, weight, 
+height, and activity level. Protein helps build muscle, carbohydrates provide energy, 
+and fats support hormone production. Drink plenty of water, eat fruits and vegetables, 
+and maintain a healthy weight through proper nutrition and exercise.
+"""
+
+# Threads used to query the nutrition APIs concurrently
+nutrition_api_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='nutrition-api')
+
+# External API answers are cached per normalized query for up to this long
+API_CACHE_SECONDS = 3600
+
+def api_cache_bucket():
+    """Current API_CACHE_SECONDS time bucket, used to expire lru_cache entries"""
+    return int(time.time() // API_CACHE_SECONDS)
+
+def request_now():
+    """Current time, read once per request and shared by everything that needs it"""
+    if 'now' not in g:
+        g.now = datetime.now()
+    return g.now
+
 # Database connections
-db_connection = None
+mysql_pool = None
 mongo_db = None
 firebase_db = None
 
+# MySQL statements, defined once instead of per call. They run on plain cursors
+# (see mysql_connection): with executemany a plain cursor also folds a batch
+# into one multi-row INSERT, where a prepared cursor executes row by row
+INSERT_MEAL_LOG_SQL = "INSERT INTO meal_logs (meal_id, timestamp) VALUES (%s, %s)"
+INSERT_CHAT_MESSAGE_SQL = "INSERT INTO chat_messages (user_message, ai_response, timestamp) VALUES (%s, %s, %s)"
+INSERT_WELLNESS_LOG_SQL = "INSERT INTO wellness_logs (sleep_hours, stress_level, timestamp) VALUES (%s, %s, %s)"
+INSERT_USER_PROFILE_SQL = """
+INSERT INTO user_profiles 
+(profile_id, name, email, age, height, weight, activity_level, 
+ dietary_restrictions, goals, created_at) 
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+INSERT_USER_GOALS_SQL = """
+INSERT INTO user_goals 
+(goals_id, daily_calories, protein_grams, water_liters, weight_goal, created_at) 
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Plain inserts used when sp_save_user_nutrition is missing (MySQL error 1305)
+INSERT_USER_SQL = "INSERT INTO users (age, gender, height, weight, activity_level) VALUES (%s, %s, %s, %s, %s)"
+INSERT_NUTRITION_PROFILE_SQL = """
+INSERT INTO nutrition_profiles 
+(user_id, bmi, bmr, tdee, calorie_goal, protein_goal, carb_goal, fat_goal, water_goal) 
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+MYSQL_PROCEDURE_MISSING = 1305
+MYSQL_PROCEDURE_EXISTS = 1304
+
+# Sent as one statement rather than cursor.callproc(), which issues a SET per
+# argument plus a SELECT for OUT parameters (15 round trips instead of 1)
+CALL_SAVE_USER_NUTRITION_SQL = "CALL sp_save_user_nutrition(" + ", ".join(["%s"] * 13) + ")"
+
+# Inserts a user and their nutrition profile in one server round trip
+CREATE_SAVE_USER_NUTRITION_PROCEDURE_SQL = """
+CREATE PROCEDURE sp_save_user_nutrition(
+    IN p_age INT, IN p_gender VARCHAR(10), IN p_height DECIMAL(5,2),
+    IN p_weight DECIMAL(5,2), IN p_activity_level VARCHAR(20),
+    IN p_bmi DECIMAL(5,2), IN p_bmr DECIMAL(7,2), IN p_tdee DECIMAL(7,2),
+    IN p_calorie_goal DECIMAL(7,2), IN p_protein_goal DECIMAL(6,2),
+    IN p_carb_goal DECIMAL(6,2), IN p_fat_goal DECIMAL(6,2), IN p_water_goal DECIMAL(5,2)
+)
+BEGIN
+    INSERT INTO users (age, gender, height, weight, activity_level)
+    VALUES (p_age, p_gender, p_height, p_weight, p_activity_level);
+    
+    INSERT INTO nutrition_profiles
+    (user_id, bmi, bmr, tdee, calorie_goal, protein_goal, carb_goal, fat_goal, water_goal)
+    VALUES (LAST_INSERT_ID(), p_bmi, p_bmr, p_tdee, p_calorie_goal, p_protein_goal,
+            p_carb_goal, p_fat_goal, p_water_goal);
+END
+"""
+
+# Writes the response doesn't depend on are queued and run by background threads.
+# The drivers are blocking, so several workers keep one slow round trip from
+# stalling the rest of the queue (each borrows its own pooled connection).
+DB_WRITE_QUEUE = queue.Queue(maxsize=10000)
+DB_WRITE_WORKERS = int(os.getenv('DB_WRITE_WORKERS', 4))
+DB_WRITE_SHUTDOWN_TIMEOUT = float(os.getenv('DB_WRITE_SHUTDOWN_TIMEOUT', 10))
+
+# mysql-connector opens every pooled connection up front, so size the pool to
+# what one process can use at once: request threads (GUNICORN_THREADS, see
+# gunicorn_conf.py), the background writers and the wellness flush timer
+MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', int(os.getenv('GUNICORN_THREADS', 4)) + DB_WRITE_WORKERS + 1))
+
+def db_write_worker():
+    """Run queued (save_function, args) writes forever"""
+    while True:
+        save_function, args = DB_WRITE_QUEUE.get()
+        try:
+            save_function(*args)
+        except Exception as e:
+            print(f"Background write error: {e}")
+        finally:
+            DB_WRITE_QUEUE.task_done()
+
+def enqueue_db_write(save_function, *args):
+    """Queue a database write, or run it inline if the queue is full"""
+    try:
+        DB_WRITE_QUEUE.put_nowait((save_function, args))
+    except queue.Full:
+        save_function(*args)
+
 def initialize_databases():
     """Initialize database connections based on configuration"""
-    global db_connection, mongo_db, firebase_db
+    global mysql_pool, mongo_db, firebase_db
     
     try:
         if DATABASE_TYPE == 'mysql':
-            db_connection = mysql.connector.connect(
+            from mysql.connector import pooling
+            
+            # Pooled connections so concurrent requests don't serialize on one socket
+            mysql_pool = pooling.MySQLConnectionPool(
+                pool_name='smarteats',
+                pool_size=MYSQL_POOL_SIZE,
                 host=os.getenv('MYSQL_HOST', 'localhost'),
                 port=int(os.getenv('MYSQL_PORT', 3306)),
                 user=os.getenv('MYSQL_USER', 'root'),
@@ -56,13 +200,19 @@ def initialize_databases():
                 database=os.getenv('MYSQL_DB', 'smarteats')
             )
             print("✅ MySQL connected successfully")
+            ensure_mysql_procedures()
             
         elif DATABASE_TYPE == 'mongodb':
+            from pymongo import MongoClient
+            
             mongo_client = MongoClient(os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
             mongo_db = mongo_client[os.getenv('MONGODB_DB', 'smarteats')]
             print("✅ MongoDB connected successfully")
             
         elif DATABASE_TYPE == 'firebase':
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            
             # Initialize Firebase
             if not firebase_admin._apps:
                 firebase_config = {
@@ -80,39 +230,85 @@ def initialize_databases():
         print(f"⚠️  Database connection failed: {e}")
         print("📝 Running in demo mode - some features may have limited functionality")
         print("👍 API endpoints will work with sample data instead of live database")
+    
+    for worker in range(DB_WRITE_WORKERS):
+        threading.Thread(target=db_write_worker, name=f'db-writer-{worker}', daemon=True).start()
+
+# Plain cursors on purpose, not cursor(prepared=True): a pooled connection is
+# reset (COM_RESET_CONNECTION) every time it is borrowed, which drops any
+# server-side prepared statement, so each prepared cursor would cost an extra
+# PREPARE round trip per write instead of saving one
+@contextmanager
+def mysql_connection():
+    """Borrow a connection from the MySQL pool; closing it returns it to the pool"""
+    connection = mysql_pool.get_connection()
+    try:
+        yield connection
+    finally:
+        connection.close()
+
+def ensure_mysql_procedures():
+    """Create sp_save_user_nutrition on databases set up before it existed"""
+    try:
+        with mysql_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT 1 FROM information_schema.ROUTINES "
+                "WHERE ROUTINE_SCHEMA = DATABASE() AND ROUTINE_NAME = 'sp_save_user_nutrition'"
+            )
+            if not cursor.fetchall():
+                cursor.execute(CREATE_SAVE_USER_NUTRITION_PROCEDURE_SQL)
+            cursor.close()
+    except Exception as e:
+        # Another worker creating it at the same moment is fine; anything else
+        # (e.g. no CREATE ROUTINE privilege) leaves save_to_mysql on plain INSERTs
+        if getattr(e, 'errno', None) != MYSQL_PROCEDURE_EXISTS:
+            print(f"⚠️  Could not create MySQL procedures: {e}")
 
 # Initialize on startup
 initialize_databases()
 
+@lru_cache(maxsize=64)
+def json_body_etag(body):
+    """Strong ETag for a pre-serialized JSON body, hashed once per body"""
+    return hashlib.blake2b(body.encode(), digest_size=8).hexdigest()
+
+def cached_json_response(body, max_age):
+    """Response for a pre-serialized JSON body that clients and proxies may cache"""
+    response = app.response_class(body, mimetype='application/json')
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    response.set_etag(json_body_etag(body))
+    # Answers 304 Not Modified when If-None-Match already has this ETag
+    return response.make_conditional(request)
+
 # API Routes
 
+HEALTH_BODY = app.json.dumps({
+    "status": "healthy",
+    "message": "SmartEats API is running",
+    "database": DATABASE_TYPE,
+    "sdg_goals": ["SDG 2: Zero Hunger", "SDG 3: Good Health and Well-Being"]
+})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "message": "SmartEats API is running",
-        "database": DATABASE_TYPE,
-        "sdg_goals": ["SDG 2: Zero Hunger", "SDG 3: Good Health and Well-Being"]
-    })
+    return cached_json_response(HEALTH_BODY, 60)
 
 @app.route('/api/nutrition/calculate', methods=['POST'])
 def calculate_nutrition():
     """Calculate personalized nutrition needs"""
     try:
-        data = request.get_json()
-        
-        # Validate input
-        required_fields = ['age', 'gender', 'height', 'weight', 'activity']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing field: {field}"}), 400
+        data, error = parse_nutrition_input(request.get_json())
+        if error:
+            return jsonify({"error": error}), 400
         
         # Calculate nutrition values
         results = calculate_nutrition_values(data)
         
-        # Save to database
-        save_user_profile(data, results)
+        # Save to database (in the background)
+        enqueue_db_write(save_user_profile, data, results)
         
         return jsonify({
             "success": True,
@@ -123,6 +319,38 @@ def calculate_nutrition():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Fields required by calculate_nutrition and the numeric ones among them
+NUTRITION_REQUIRED_FIELDS = ('age', 'gender', 'height', 'weight', 'activity')
+# Field -> type; age stays an int so stored profile documents keep their schema
+NUTRITION_NUMERIC_FIELDS = {'age': int, 'height': float, 'weight': float}
+
+def parse_nutrition_input(data):
+    """Validate nutrition input in one pass; returns (data, error message)"""
+    if not isinstance(data, dict):
+        return None, "Request body must be a JSON object"
+    
+    for field in NUTRITION_REQUIRED_FIELDS:
+        if field not in data:
+            return None, f"Missing field: {field}"
+    
+    # JSON clients often send numbers as strings; coerce once here so the
+    # arithmetic in calculate_nutrition_values never sees a str
+    try:
+        numeric = {field: to_number(data[field]) for field, to_number in NUTRITION_NUMERIC_FIELDS.items()}
+    except (TypeError, ValueError):
+        return None, "age, height and weight must be numbers"
+    
+    return {**data, **numeric}, None
+
+# TDEE activity multipliers
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'very': 1.725,
+    'extra': 1.9
+}
+
 def calculate_nutrition_values(data):
     """Calculate BMI, BMR, TDEE, and macronutrients"""
     age = data['age']
@@ -141,16 +369,7 @@ def calculate_nutrition_values(data):
     else:
         bmr = 10 * weight + 6.25 * height - 5 * age - 161
     
-    # Activity multipliers
-    activity_multipliers = {
-        'sedentary': 1.2,
-        'light': 1.375,
-        'moderate': 1.55,
-        'very': 1.725,
-        'extra': 1.9
-    }
-    
-    tdee = bmr * activity_multipliers.get(activity, 1.2)
+    tdee = bmr * ACTIVITY_MULTIPLIERS.get(activity, 1.2)
     
     # Macronutrient calculations
     protein = weight * 2.2  # 2.2g per kg
@@ -158,11 +377,14 @@ def calculate_nutrition_values(data):
     carbs = (tdee - (protein * 4) - (fat * 9)) / 4  # Remaining from carbs
     water = weight * 0.035  # 35ml per kg
     
+    # TDEE doubles as the calorie goal
+    calories = round(tdee)
+    
     return {
         "bmi": round(bmi, 1),
         "bmr": round(bmr),
-        "tdee": round(tdee),
-        "calories": round(tdee),
+        "tdee": calories,
+        "calories": calories,
         "protein": round(protein),
         "carbs": round(carbs),
         "fat": round(fat),
@@ -183,40 +405,40 @@ def save_user_profile(profile_data, nutrition_results):
 
 def save_to_mysql(profile_data, nutrition_results):
     """Save to MySQL database"""
-    if not db_connection:
+    if not mysql_pool:
         print("No MySQL connection available - running in demo mode")
         return
         
-    cursor = db_connection.cursor()
-    
-    # Insert user profile
-    user_query = """
-    INSERT INTO users (age, gender, height, weight, activity_level) 
-    VALUES (%s, %s, %s, %s, %s)
-    """
-    cursor.execute(user_query, (
-        profile_data['age'], profile_data['gender'], 
-        profile_data['height'], profile_data['weight'], 
-        profile_data['activity']
-    ))
-    
-    user_id = cursor.lastrowid
-    
-    # Insert nutrition profile
-    nutrition_query = """
-    INSERT INTO nutrition_profiles 
-    (user_id, bmi, bmr, tdee, calorie_goal, protein_goal, carb_goal, fat_goal, water_goal) 
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    cursor.execute(nutrition_query, (
-        user_id, nutrition_results['bmi'], nutrition_results['bmr'],
-        nutrition_results['tdee'], nutrition_results['calories'],
-        nutrition_results['protein'], nutrition_results['carbs'],
-        nutrition_results['fat'], nutrition_results['water']
-    ))
-    
-    db_connection.commit()
-    cursor.close()
+    with mysql_connection() as connection:
+        cursor = connection.cursor()
+        
+        user_values = (
+            profile_data['age'], profile_data['gender'], 
+            profile_data['height'], profile_data['weight'], 
+            profile_data['activity']
+        )
+        nutrition_values = (
+            nutrition_results['bmi'], nutrition_results['bmr'],
+            nutrition_results['tdee'], nutrition_results['calories'],
+            nutrition_results['protein'], nutrition_results['carbs'],
+            nutrition_results['fat'], nutrition_results['water']
+        )
+        
+        try:
+            # Insert user profile and nutrition profile in a single procedure call
+            # A CALL answers with an extra status result: drain it before committing
+            for _ in cursor.execute(CALL_SAVE_USER_NUTRITION_SQL,
+                                    user_values + nutrition_values, multi=True):
+                pass
+        except Exception as e:
+            if getattr(e, 'errno', None) != MYSQL_PROCEDURE_MISSING:
+                raise
+            # Database set up before the procedure existed: insert row by row
+            cursor.execute(INSERT_USER_SQL, user_values)
+            cursor.execute(INSERT_NUTRITION_PROFILE_SQL, (cursor.lastrowid,) + nutrition_values)
+        
+        connection.commit()
+        cursor.close()
 
 def save_to_mongodb(profile_data, nutrition_results):
     """Save to MongoDB database"""
@@ -263,97 +485,120 @@ def search_recipes():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Sample healthy recipes (a tuple, since it's shared across requests)
+RECIPES = (
+    {
+        "id": "healthy-salad",
+        "name": "Power Protein Salad",
+        "description": "Mixed greens with grilled chicken, quinoa, and avocado",
+        "calories": 420,
+        "protein": 35,
+        "carbs": 25,
+        "fat": 18,
+        "prepTime": 20,
+        "image": "https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=300&h=200&fit=crop",
+        "ingredients": ["chicken", "quinoa", "lettuce", "avocado", "tomatoes"]
+    },
+    {
+        "id": "salmon-rice",
+        "name": "Baked Salmon & Brown Rice",
+        "description": "Omega-3 rich salmon with fiber-packed brown rice and vegetables",
+        "calories": 380,
+        "protein": 28,
+        "carbs": 35,
+        "fat": 12,
+        "prepTime": 30,
+        "image": "https://images.unsplash.com/photo-1519708227418-c8fd9a32b7a2?w=300&h=200&fit=crop",
+        "ingredients": ["salmon", "brown rice", "broccoli", "carrots"]
+    },
+    {
+        "id": "veggie-wrap",
+        "name": "Mediterranean Veggie Wrap",
+        "description": "Hummus, fresh vegetables, and feta in whole wheat wrap",
+        "calories": 320,
+        "protein": 15,
+        "carbs": 40,
+        "fat": 12,
+        "prepTime": 10,
+        "image": "https://images.unsplash.com/photo-1565958011703-44f9829ba187?w=300&h=200&fit=crop",
+        "ingredients": ["hummus", "vegetables", "feta", "wrap", "cucumber"]
+    },
+    {
+        "id": "quinoa-bowl",
+        "name": "Quinoa Buddha Bowl",
+        "description": "Nutritious quinoa with roasted vegetables and tahini dressing",
+        "calories": 390,
+        "protein": 18,
+        "carbs": 45,
+        "fat": 15,
+        "prepTime": 25,
+        "image": "https://images.unsplash.com/photo-1512621776951-a57141f2eefd?w=300&h=200&fit=crop",
+        "ingredients": ["quinoa", "sweet potato", "chickpeas", "kale", "tahini"]
+    },
+    {
+        "id": "egg-toast",
+        "name": "Avocado Egg Toast",
+        "description": "Whole grain toast with avocado and poached egg",
+        "calories": 280,
+        "protein": 12,
+        "carbs": 20,
+        "fat": 18,
+        "prepTime": 8,
+        "image": "https://images.unsplash.com/photo-1482049016688-2d3e1b311543?w=300&h=200&fit=crop",
+        "ingredients": ["bread", "avocado", "egg", "tomato"]
+    }
+)
+
+def singular_ingredient(name):
+    """Strip simple English plurals from each word ('cherry tomatoes' -> 'cherry tomato')"""
+    words = []
+    for word in name.split():
+        if len(word) > 4 and word.endswith('ies'):
+            word = word[:-3] + 'y'
+        elif len(word) > 3 and word.endswith('oes'):
+            word = word[:-2]
+        elif len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+            word = word[:-1]
+        words.append(word)
+    return ' '.join(words)
+
+def recipe_ingredient_tokens(ingredients):
+    """Lowercased ingredients plus their individual words ('brown rice' -> 'brown', 'rice')"""
+    tokens = set()
+    for ingredient in ingredients:
+        ingredient = singular_ingredient(ingredient.lower())
+        tokens.add(ingredient)
+        tokens.update(ingredient.split())
+    return frozenset(tokens)
+
+# Ingredient sets are precomputed once so filtering is a set intersection per recipe
+RECIPE_INGREDIENT_SETS = [(recipe, recipe_ingredient_tokens(recipe['ingredients'])) for recipe in RECIPES]
+
 def generate_recipe_suggestions(ingredients):
     """Generate healthy recipe suggestions"""
-    # Sample healthy recipes
-    all_recipes = [
-        {
-            "id": "healthy-salad",
-            "name": "Power Protein Salad",
-            "description": "Mixed greens with grilled chicken, quinoa, and avocado",
-            "calories": 420,
-            "protein": 35,
-            "carbs": 25,
-            "fat": 18,
-            "prepTime": 20,
-            "image": "https://images.unsplash.com/photo-1546069901-ba9599a7e63c?w=300&h=200&fit=crop",
-            "ingredients": ["chicken", "quinoa", "lettuce", "avocado", "tomatoes"]
-        },
-        {
-            "id": "salmon-rice",
-            "name": "Baked Salmon & Brown Rice",
-            "description": "Omega-3 rich salmon with fiber-packed brown rice and vegetables",
-            "calories": 380,
-            "protein": 28,
-            "carbs": 35,
-            "fat": 12,
-            "prepTime": 30,
-            "image": "https://images.unsplash.com/photo-1519708227418-c8fd9a32b7a2?w=300&h=200&fit=crop",
-            "ingredients": ["salmon", "brown rice", "broccoli", "carrots"]
-        },
-        {
-            "id": "veggie-wrap",
-            "name": "Mediterranean Veggie Wrap",
-            "description": "Hummus, fresh vegetables, and feta in whole wheat wrap",
-            "calories": 320,
-            "protein": 15,
-            "carbs": 40,
-            "fat": 12,
-            "prepTime": 10,
-            "image": "https://images.unsplash.com/photo-1565958011703-44f9829ba187?w=300&h=200&fit=crop",
-            "ingredients": ["hummus", "vegetables", "feta", "wrap", "cucumber"]
-        },
-        {
-            "id": "quinoa-bowl",
-            "name": "Quinoa Buddha Bowl",
-            "description": "Nutritious quinoa with roasted vegetables and tahini dressing",
-            "calories": 390,
-            "protein": 18,
-            "carbs": 45,
-            "fat": 15,
-            "prepTime": 25,
-            "image": "https://images.unsplash.com/photo-1512621776951-a57141f2eefd?w=300&h=200&fit=crop",
-            "ingredients": ["quinoa", "sweet potato", "chickpeas", "kale", "tahini"]
-        },
-        {
-            "id": "egg-toast",
-            "name": "Avocado Egg Toast",
-            "description": "Whole grain toast with avocado and poached egg",
-            "calories": 280,
-            "protein": 12,
-            "carbs": 20,
-            "fat": 18,
-            "prepTime": 8,
-            "image": "https://images.unsplash.com/photo-1482049016688-2d3e1b311543?w=300&h=200&fit=crop",
-            "ingredients": ["bread", "avocado", "egg", "tomato"]
-        }
-    ]
-    
     # Filter recipes based on ingredients (simple matching)
     if ingredients:
-        ingredient_list = [ing.strip().lower() for ing in ingredients.split(',')]
-        filtered_recipes = []
-        
-        for recipe in all_recipes:
-            recipe_ingredients = [ing.lower() for ing in recipe['ingredients']]
-            # Check if any user ingredient matches recipe ingredients
-            if any(user_ing in ' '.join(recipe_ingredients) for user_ing in ingredient_list):
-                filtered_recipes.append(recipe)
+        user_ingredients = frozenset(singular_ingredient(ing.strip().lower()) for ing in ingredients.split(','))
+        filtered_recipes = [
+            recipe for recipe, ingredient_set in RECIPE_INGREDIENT_SETS
+            if user_ingredients & ingredient_set
+        ]
         
-        return filtered_recipes if filtered_recipes else all_recipes[:3]
+        return filtered_recipes if filtered_recipes else RECIPES[:3]
     
-    return all_recipes
+    return RECIPES
 
 @app.route('/api/meals/log', methods=['POST'])
 def log_meal():
     """Log a meal consumption"""
     try:
+        now = datetime.now()
         data = request.get_json()
         meal_id = data.get('meal_id')
-        timestamp = data.get('timestamp', datetime.now().isoformat())
+        timestamp = data.get('timestamp', now.isoformat())
         
-        # Save meal log to database
-        save_meal_log(meal_id, timestamp)
+        # Save meal log to database (in the background)
+        enqueue_db_write(save_meal_log, meal_id, timestamp, now)
         
         return jsonify({
             "success": True,
@@ -364,28 +609,28 @@ def log_meal():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def save_meal_log(meal_id, timestamp):
+def save_meal_log(meal_id, timestamp, created_at):
     """Save meal log to database"""
     try:
-        if DATABASE_TYPE == 'mysql' and db_connection:
-            cursor = db_connection.cursor()
-            query = "INSERT INTO meal_logs (meal_id, timestamp) VALUES (%s, %s)"
-            cursor.execute(query, (meal_id, timestamp))
-            db_connection.commit()
-            cursor.close()
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(INSERT_MEAL_LOG_SQL, (meal_id, timestamp))
+                connection.commit()
+                cursor.close()
             
         elif DATABASE_TYPE == 'mongodb' and mongo_db:
             mongo_db.meal_logs.insert_one({
                 "meal_id": meal_id,
                 "timestamp": timestamp,
-                "created_at": datetime.now()
+                "created_at": created_at
             })
             
         elif DATABASE_TYPE == 'firebase' and firebase_db:
             firebase_db.collection('meal_logs').add({
                 "meal_id": meal_id,
                 "timestamp": timestamp,
-                "created_at": datetime.now()
+                "created_at": created_at
             })
         else:
             print(f"Meal log saved locally (demo mode): {meal_id} at {timestamp}")
@@ -393,23 +638,90 @@ def save_meal_log(meal_id, timestamp):
     except Exception as e:
         print(f"Error saving meal log: {e}")
 
+@app.route('/api/meals/log/batch', methods=['POST'])
+def log_meals_batch():
+    """Log several meals at once (e.g. offline sync from mobile)"""
+    try:
+        now = datetime.now()
+        data = request.get_json()
+        entries = data.get('meals', []) if isinstance(data, dict) else data
+        if not isinstance(entries, list) or not entries:
+            return jsonify({"error": "Expected a non-empty list of meals"}), 400
+        if not all(isinstance(entry, dict) and entry.get('meal_id') is not None
+                   for entry in entries):
+            return jsonify({"error": "Each meal must be an object with a meal_id"}), 400
+        
+        default_timestamp = now.isoformat()
+        rows = [
+            (entry.get('meal_id'), entry.get('timestamp', default_timestamp))
+            for entry in entries
+        ]
+        
+        # Save all meal logs in one round trip (in the background)
+        enqueue_db_write(save_meal_logs, rows, now)
+        
+        return jsonify({
+            "success": True,
+            "message": f"{len(rows)} meals logged successfully",
+            "logged": len(rows)
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def save_meal_logs(rows, created_at):
+    """Save (meal_id, timestamp) rows to database in a single batch"""
+    try:
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor()
+                cursor.executemany(INSERT_MEAL_LOG_SQL, rows)
+                connection.commit()
+                cursor.close()
+            
+        elif DATABASE_TYPE == 'mongodb' and mongo_db:
+            mongo_db.meal_logs.insert_many([
+                {"meal_id": meal_id, "timestamp": timestamp, "created_at": created_at}
+                for meal_id, timestamp in rows
+            ], ordered=False)
+            
+        elif DATABASE_TYPE == 'firebase' and firebase_db:
+            meal_logs = firebase_db.collection('meal_logs')
+            # Firestore batches are capped at 500 writes
+            for start in range(0, len(rows), 500):
+                batch = firebase_db.batch()
+                for meal_id, timestamp in rows[start:start + 500]:
+                    batch.set(meal_logs.document(), {
+                        "meal_id": meal_id,
+                        "timestamp": timestamp,
+                        "created_at": created_at
+                    })
+                batch.commit()
+        else:
+            print(f"{len(rows)} meal logs saved locally (demo mode)")
+            
+    except Exception as e:
+        print(f"Error saving meal logs: {e}")
+
 @app.route('/api/chat', methods=['POST'])
 def chat_with_ai():
     """Chat with AI nutrition assistant using Hugging Face API"""
+    # One clock read per request, shared by the saved row and the response
+    now = datetime.now()
     try:
         data = request.get_json()
         user_message = data.get('message', '')
         
-        # Get AI response from Hugging Face
+        # Get AI response from Hugging Face (repeat questions come from cache)
         ai_response = get_hugging_face_response(user_message)
         
-        # Save chat to database
-        save_chat_message(user_message, ai_response)
+        # Save chat to database (in the background)
+        enqueue_db_write(save_chat_message, user_message, ai_response, now)
         
         return jsonify({
             "success": True,
             "response": ai_response,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         })
         
     except Exception as e:
@@ -418,80 +730,86 @@ def chat_with_ai():
         return jsonify({
             "success": True,
             "response": local_response,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "source": "local_fallback"
         })
 
 def get_hugging_face_response(question):
-    """Get response from Hugging Face Question-Answering API"""
+    """Get response from Hugging Face Question-Answering API, or a local answer"""
     try:
-        # Nutrition context for better answers
-        context = """
-        Nutrition is essential for good health. A balanced diet includes proteins, carbohydrates, 
-        healthy fats, vitamins, and minerals. Daily calorie needs vary by age, gender, weight, 
-        height, and activity level. Protein helps build muscle, carbohydrates provide energy, 
-        and fats support hormone production. Drink plenty of water, eat fruits and vegetables, 
-        and maintain a healthy weight through proper nutrition and exercise.
-        """
-        
-        headers = {"Authorization": f"Bearer {HUGGING_FACE_API_KEY}"}
-        
-        payload = {
-            "inputs": {
-                "question": question,
-                "context": context
-            }
-        }
-        
-        response = requests.post(
-            "https://api-inference.huggingface.co/models/deepset/roberta-base-squad2",
-            headers=headers,
-            json=payload,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            return result.get('answer', get_local_nutrition_response(question))
-        else:
-            return get_local_nutrition_response(question)
-            
+        return cached_hugging_face_answer(question.strip(), api_cache_bucket())
     except Exception as e:
+        # Failures raise out of the cache, so a transient outage is never memoized
         print(f"Hugging Face API error: {e}")
         return get_local_nutrition_response(question)
 
-def get_local_nutrition_response(message):
-    """Generate local nutrition responses"""
-    responses = {
-        "protein": "For optimal health, aim for 0.8-2.2g of protein per kg of body weight daily. Good sources include lean meats, fish, eggs, legumes, and dairy products. 🥩",
-        "water": "Drink at least 8 glasses (2L) of water daily. Your needs may increase with exercise or hot weather. Proper hydration supports metabolism! 💧",
-        "weight": "Healthy weight loss is 0.5-1kg per week. Focus on a balanced diet with moderate calorie deficit and regular exercise. ⚖️",
-        "calories": "Daily calorie needs depend on age, gender, weight, height, and activity level. Use our nutrition calculator for personalized recommendations! 🔥",
-        "vegetables": "Aim for 5-9 servings of fruits and vegetables daily. They provide essential vitamins, minerals, and fiber. Eat the rainbow! 🥬🥕",
-        "exercise": "Combine 150 minutes of moderate cardio weekly with 2-3 strength training sessions. Exercise boosts metabolism! 💪",
-        "hunger": "Combat hunger with nutrient-dense foods: whole grains, lean proteins, fruits, and vegetables. Small frequent meals help maintain energy levels! 🍽️",
-        "health": "Good health starts with balanced nutrition, regular exercise, adequate sleep, and stress management. Small consistent changes make big impacts! 🌟"
+@lru_cache(maxsize=4096)
+def cached_hugging_face_answer(question, time_bucket):
+    """Memoized query_hugging_face_api for a stripped question"""
+    return query_hugging_face_api(question)
+
+def query_hugging_face_api(question):
+    """Query Hugging Face Question-Answering API; raises if there is no answer"""
+    payload = {
+        "inputs": {
+            "question": question,
+            "context": NUTRITION_QA_CONTEXT
+        }
     }
     
-    message_lower = message.lower()
+    response = http_session.post(
+        HUGGING_FACE_QA_URL,
+        headers=HUGGING_FACE_HEADERS,
+        json=payload,
+        timeout=10
+    )
+    response.raise_for_status()
     
-    for keyword, response in responses.items():
-        if keyword in message_lower:
+    answer = response.json().get('answer')
+    if not answer:
+        raise ValueError("Hugging Face response has no answer")
+    return answer
+
+LOCAL_NUTRITION_RESPONSES = {
+    "protein": "For optimal health, aim for 0.8-2.2g of protein per kg of body weight daily. Good sources include lean meats, fish, eggs, legumes, and dairy products. 🥩",
+    "water": "Drink at least 8 glasses (2L) of water daily. Your needs may increase with exercise or hot weather. Proper hydration supports metabolism! 💧",
+    "weight": "Healthy weight loss is 0.5-1kg per week. Focus on a balanced diet with moderate calorie deficit and regular exercise. ⚖️",
+    "calories": "Daily calorie needs depend on age, gender, weight, height, and activity level. Use our nutrition calculator for personalized recommendations! 🔥",
+    "vegetables": "Aim for 5-9 servings of fruits and vegetables daily. They provide essential vitamins, minerals, and fiber. Eat the rainbow! 🥬🥕",
+    "exercise": "Combine 150 minutes of moderate cardio weekly with 2-3 strength training sessions. Exercise boosts metabolism! 💪",
+    "hunger": "Combat hunger with nutrient-dense foods: whole grains, lean proteins, fruits, and vegetables. Small frequent meals help maintain energy levels! 🍽️",
+    "health": "Good health starts with balanced nutrition, regular exercise, adequate sleep, and stress management. Small consistent changes make big impacts! 🌟"
+}
+LOCAL_NUTRITION_FALLBACK = "I'm here to help with nutrition questions! Ask me about calories, protein, healthy recipes, weight management, or wellness tips. Fighting hunger and promoting health together! 🍎✨"
+
+# One alternation over every keyword, so a message is scanned once
+LOCAL_NUTRITION_KEYWORD_RE = re.compile('|'.join(map(re.escape, LOCAL_NUTRITION_RESPONSES)))
+
+def get_local_nutrition_response(message):
+    """Generate local nutrition responses"""
+    return local_nutrition_response(message.lower().strip())
+
+@lru_cache(maxsize=2048)
+def local_nutrition_response(message_lower):
+    """Local nutrition response for an already lowercased message"""
+    found = set(LOCAL_NUTRITION_KEYWORD_RE.findall(message_lower))
+    
+    # Keep the original priority: first keyword in LOCAL_NUTRITION_RESPONSES order wins
+    for keyword, response in LOCAL_NUTRITION_RESPONSES.items():
+        if keyword in found:
             return response
     
-    return "I'm here to help with nutrition questions! Ask me about calories, protein, healthy recipes, weight management, or wellness tips. Fighting hunger and promoting health together! 🍎✨"
+    return LOCAL_NUTRITION_FALLBACK
 
-def save_chat_message(user_message, ai_response):
+def save_chat_message(user_message, ai_response, timestamp):
     """Save chat interaction to database"""
     try:
-        timestamp = datetime.now()
-        
-        if DATABASE_TYPE == 'mysql' and db_connection:
-            cursor = db_connection.cursor()
-            query = "INSERT INTO chat_messages (user_message, ai_response, timestamp) VALUES (%s, %s, %s)"
-            cursor.execute(query, (user_message, ai_response, timestamp))
-            db_connection.commit()
-            cursor.close()
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(INSERT_CHAT_MESSAGE_SQL, (user_message, ai_response, timestamp))
+                connection.commit()
+                cursor.close()
             
         elif DATABASE_TYPE == 'mongodb' and mongo_db:
             mongo_db.chat_messages.insert_one({
@@ -512,77 +830,72 @@ def save_chat_message(user_message, ai_response):
     except Exception as e:
         print(f"Error saving chat message: {e}")
 
+# Sample meal data - in real app, fetch from database
+MEALS = [
+    {
+        "id": "breakfast-1",
+        "name": "Oatmeal with Berries",
+        "category": "breakfast",
+        "calories": 300,
+        "protein": 10,
+        "carbs": 55,
+        "fat": 5,
+        "sdg_benefit": "Provides sustained energy and essential nutrients (SDG 3)"
+    },
+    {
+        "id": "lunch-1", 
+        "name": "Quinoa Veggie Bowl",
+        "category": "lunch",
+        "calories": 400,
+        "protein": 15,
+        "carbs": 60,
+        "fat": 12,
+        "sdg_benefit": "Plant-based protein supports food security (SDG 2)"
+    },
+    {
+        "id": "dinner-1",
+        "name": "Grilled Fish with Vegetables",
+        "category": "dinner", 
+        "calories": 350,
+        "protein": 30,
+        "carbs": 20,
+        "fat": 15,
+        "sdg_benefit": "Lean protein promotes healthy development (SDG 3)"
+    }
+]
+
+# Static response bodies are serialized once at import
+MEALS_BODY = app.json.dumps({
+    "success": True,
+    "meals": MEALS,
+    "total": len(MEALS)
+})
+
 @app.route('/api/meals', methods=['GET'])
 def get_meals():
     """Get available meals from database"""
-    try:
-        # Sample meal data - in real app, fetch from database
-        meals = [
-            {
-                "id": "breakfast-1",
-                "name": "Oatmeal with Berries",
-                "category": "breakfast",
-                "calories": 300,
-                "protein": 10,
-                "carbs": 55,
-                "fat": 5,
-                "sdg_benefit": "Provides sustained energy and essential nutrients (SDG 3)"
-            },
-            {
-                "id": "lunch-1", 
-                "name": "Quinoa Veggie Bowl",
-                "category": "lunch",
-                "calories": 400,
-                "protein": 15,
-                "carbs": 60,
-                "fat": 12,
-                "sdg_benefit": "Plant-based protein supports food security (SDG 2)"
-            },
-            {
-                "id": "dinner-1",
-                "name": "Grilled Fish with Vegetables",
-                "category": "dinner", 
-                "calories": 350,
-                "protein": 30,
-                "carbs": 20,
-                "fat": 15,
-                "sdg_benefit": "Lean protein promotes healthy development (SDG 3)"
-            }
-        ]
-        
-        return jsonify({
-            "success": True,
-            "meals": meals,
-            "total": len(meals)
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return cached_json_response(MEALS_BODY, 300)
+
+# Sample stats - in real app, calculate from database
+DASHBOARD_STATS_BODY = app.json.dumps({
+    "success": True,
+    "stats": {
+        "calories_today": 1250,
+        "water_intake": "1.5L",
+        "meals_logged": 3,
+        "protein_goal_progress": 75,
+        "weekly_progress": [1200, 1350, 1100, 1450, 1300, 1250, 1400]
+    },
+    "sdg_impact": {
+        "hunger_prevention": "Proper nutrition planning helps prevent malnutrition",
+        "health_promotion": "Tracking supports maintaining healthy lifestyle"
+    }
+})
 
 @app.route('/api/stats/dashboard', methods=['GET'])
 def get_dashboard_stats():
     """Get dashboard statistics"""
-    try:
-        # Sample stats - in real app, calculate from database
-        stats = {
-            "calories_today": 1250,
-            "water_intake": "1.5L",
-            "meals_logged": 3,
-            "protein_goal_progress": 75,
-            "weekly_progress": [1200, 1350, 1100, 1450, 1300, 1250, 1400]
-        }
-        
-        return jsonify({
-            "success": True,
-            "stats": stats,
-            "sdg_impact": {
-                "hunger_prevention": "Proper nutrition planning helps prevent malnutrition",
-                "health_promotion": "Tracking supports maintaining healthy lifestyle"
-            }
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return cached_json_response(DASHBOARD_STATS_BODY, 60)
 
 @app.route('/api/nutrition/lookup', methods=['POST'])
 def lookup_food_nutrition():
@@ -594,8 +907,8 @@ def lookup_food_nutrition():
         if not food_name:
             return jsonify({"error": "Food name is required"}), 400
         
-        # Try different nutrition APIs
-        nutrition_data = get_nutrition_data(food_name)
+        # Try different nutrition APIs (repeat foods come from cache)
+        nutrition_data = get_nutrition_data(food_name.strip().lower())
         
         return jsonify({
             "success": True,
@@ -608,41 +921,47 @@ def lookup_food_nutrition():
         return jsonify({"error": str(e)}), 500
 
 def get_nutrition_data(food_name):
-    """Get nutrition data from external APIs"""
-    # Try Nutritionix API first
+    """Get nutrition data from external APIs, or sample data if none answer"""
     try:
-        nutritionix_data = query_nutritionix_api(food_name)
-        if nutritionix_data:
-            return nutritionix_data
-    except Exception as e:
-        print(f"Nutritionix API error: {e}")
-    
-    # Fallback to CalorieNinjas API
-    try:
-        calorie_ninja_data = query_calorie_ninjas_api(food_name)
-        if calorie_ninja_data:
-            return calorie_ninja_data
-    except Exception as e:
-        print(f"CalorieNinjas API error: {e}")
+        return cached_nutrition_data(food_name, api_cache_bucket())
+    except LookupError:
+        # Not memoized: the APIs are tried again on the next lookup
+        return get_sample_nutrition_data(food_name)
+
+@lru_cache(maxsize=4096)
+def cached_nutrition_data(food_name, time_bucket):
+    """Memoized query_nutrition_apis for a normalized food name"""
+    return query_nutrition_apis(food_name)
+
+def query_nutrition_apis(food_name):
+    """Get nutrition data from external APIs; raises LookupError if none answer"""
+    # Query Nutritionix and CalorieNinjas concurrently and take the first
+    # useful answer, so a slow API costs max(t1, t2) instead of t1 + t2
+    futures = {
+        nutrition_api_executor.submit(query_nutritionix_api, food_name): "Nutritionix",
+        nutrition_api_executor.submit(query_calorie_ninjas_api, food_name): "CalorieNinjas"
+    }
+    for future in as_completed(futures):
+        try:
+            nutrition_data = future.result()
+            if nutrition_data:
+                for pending in futures:
+                    pending.cancel()
+                return nutrition_data
+        except Exception as e:
+            print(f"{futures[future]} API error: {e}")
     
-    # Fallback to sample data
-    return get_sample_nutrition_data(food_name)
+    raise LookupError(f"No nutrition API returned data for {food_name}")
 
 def query_nutritionix_api(food_name):
     """Query Nutritionix API for nutrition data"""
-    headers = {
-        'x-app-id': NUTRITIONIX_APP_ID,
-        'x-app-key': NUTRITIONIX_API_KEY,
-        'Content-Type': 'application/json'
-    }
-    
     payload = {
         "query": food_name
     }
     
-    response = requests.post(
-        "https://trackapi.nutritionix.com/v2/natural/nutrients",
-        headers=headers,
+    response = http_session.post(
+        NUTRITIONIX_URL,
+        headers=NUTRITIONIX_HEADERS,
         json=payload,
         timeout=10
     )
@@ -666,13 +985,10 @@ def query_nutritionix_api(food_name):
 
 def query_calorie_ninjas_api(food_name):
     """Query CalorieNinjas API for nutrition data"""
-    headers = {
-        'X-Api-Key': os.getenv('CALORIE_NINJAS_API_KEY', 'YOUR_CALORIE_NINJAS_API_KEY')
-    }
-    
-    response = requests.get(
-        f"https://api.calorieninjas.com/v1/nutrition?query={food_name}",
-        headers=headers,
+    response = http_session.get(
+        CALORIE_NINJAS_URL,
+        params={'query': food_name},
+        headers=CALORIE_NINJAS_HEADERS,
         timeout=10
     )
     
@@ -693,26 +1009,36 @@ def query_calorie_ninjas_api(food_name):
             }
     return None
 
-def get_sample_nutrition_data(food_name):
-    """Get sample nutrition data as fallback"""
-    sample_foods = {
+# Sample nutrition per 100g, with serving info merged in once at import
+SAMPLE_FOODS = {
+    key: {**data, "serving_qty": 100, "serving_unit": "grams", "source": "sample_data"}
+    for key, data in {
         "apple": {"calories": 52, "protein": 0.3, "carbs": 14, "fat": 0.2, "fiber": 2.4},
         "banana": {"calories": 89, "protein": 1.1, "carbs": 23, "fat": 0.3, "fiber": 2.6},
         "chicken": {"calories": 165, "protein": 31, "carbs": 0, "fat": 3.6, "fiber": 0},
         "rice": {"calories": 130, "protein": 2.7, "carbs": 28, "fat": 0.3, "fiber": 0.4},
         "broccoli": {"calories": 34, "protein": 2.8, "carbs": 7, "fat": 0.4, "fiber": 2.6}
-    }
-    
-    food_key = food_name.lower().strip()
-    for key, data in sample_foods.items():
+    }.items()
+}
+
+# Default nutrition for unknown foods
+ESTIMATED_NUTRITION = {
+    "calories": 100, "protein": 5, "carbs": 15, "fat": 3, "fiber": 2,
+    "serving_qty": 100, "serving_unit": "grams", "source": "estimated"
+}
+
+def get_sample_nutrition_data(food_name):
+    """Get sample nutrition data as fallback"""
+    return sample_nutrition_data(food_name.lower().strip())
+
+@lru_cache(maxsize=2048)
+def sample_nutrition_data(food_key):
+    """Sample nutrition data for an already normalized food name"""
+    for key, data in SAMPLE_FOODS.items():
         if key in food_key:
-            return {**data, "serving_qty": 100, "serving_unit": "grams", "source": "sample_data"}
+            return data
     
-    # Default nutrition for unknown foods
-    return {
-        "calories": 100, "protein": 5, "carbs": 15, "fat": 3, "fiber": 2,
-        "serving_qty": 100, "serving_unit": "grams", "source": "estimated"
-    }
+    return ESTIMATED_NUTRITION
 
 @app.route('/api/recipes/spoonacular', methods=['POST'])
 def search_spoonacular_recipes():
@@ -743,8 +1069,8 @@ def query_spoonacular_api(ingredients):
             'apiKey': SPOONACULAR_API_KEY
         }
         
-        response = requests.get(
-            "https://api.spoonacular.com/recipes/findByIngredients",
+        response = http_session.get(
+            SPOONACULAR_FIND_BY_INGREDIENTS_URL,
             params=params,
             timeout=10
         )
@@ -829,19 +1155,27 @@ def export_meal_plan():
         meal_plan = get_user_meal_plan()
         
         if format_type == 'csv':
-            csv_data = convert_to_csv(meal_plan)
+            filename = f"smarteats_meal_plan_{request_now():%Y%m%d}.csv"
+            if data.get('download'):
+                # Opt-in: stream rows as a file instead of building the whole
+                # CSV string and escaping it again inside the JSON envelope
+                return Response(
+                    convert_to_csv(meal_plan),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}'}
+                )
             return jsonify({
                 "success": True,
-                "data": csv_data,
+                "data": "".join(convert_to_csv(meal_plan)).rstrip("\n"),
                 "format": "csv",
-                "filename": f"smarteats_meal_plan_{datetime.now().strftime('%Y%m%d')}.csv"
+                "filename": filename
             })
         else:
             return jsonify({
                 "success": True,
                 "data": meal_plan,
                 "format": "json",
-                "filename": f"smarteats_meal_plan_{datetime.now().strftime('%Y%m%d')}.json"
+                "filename": f"smarteats_meal_plan_{request_now():%Y%m%d}.json"
             })
         
     except Exception as e:
@@ -850,7 +1184,7 @@ def export_meal_plan():
 def get_user_meal_plan():
     """Get user's meal plan data"""
     return {
-        "date_generated": datetime.now().isoformat(),
+        "date_generated": request_now().isoformat(),
         "meals": [
             {"meal": "Breakfast", "food": "Oatmeal with Berries", "calories": 300, "protein": 10},
             {"meal": "Lunch", "food": "Quinoa Bowl", "calories": 400, "protein": 15},
@@ -860,12 +1194,23 @@ def get_user_meal_plan():
         "sdg_impact": "Balanced nutrition supporting SDG 2 & 3"
     }
 
+MEAL_PLAN_CSV_HEADER = ("Meal", "Food", "Calories", "Protein")
+
 def convert_to_csv(meal_plan):
-    """Convert meal plan to CSV format"""
-    csv_lines = ["Meal,Food,Calories,Protein"]
-    for meal in meal_plan['meals']:
-        csv_lines.append(f"{meal['meal']},{meal['food']},{meal['calories']},{meal['protein']}")
-    return "\n".join(csv_lines)
+    """Yield meal plan CSV lines one row at a time"""
+    # One C csv.writer over a buffer that is emptied after every row; it also
+    # quotes food names containing commas, which the f-string lines did not
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    
+    rows = ((meal['meal'], meal['food'], meal['calories'], meal['protein'])
+            for meal in meal_plan['meals'])
+    
+    for row in chain((MEAL_PLAN_CSV_HEADER,), rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
 
 @app.route('/api/database/setup', methods=['POST'])
 def setup_database():
@@ -887,61 +1232,70 @@ def setup_database():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Tables created by setup_mysql_tables
+MYSQL_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        age INT NOT NULL,
+        gender ENUM('male', 'female', 'other') NOT NULL,
+        height DECIMAL(5,2) NOT NULL,
+        weight DECIMAL(5,2) NOT NULL,
+        activity_level VARCHAR(20) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS nutrition_profiles (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT,
+        bmi DECIMAL(5,2),
+        bmr DECIMAL(7,2),
+        tdee DECIMAL(7,2),
+        calorie_goal DECIMAL(7,2),
+        protein_goal DECIMAL(6,2),
+        carb_goal DECIMAL(6,2),
+        fat_goal DECIMAL(6,2),
+        water_goal DECIMAL(5,2),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meal_logs (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        meal_id VARCHAR(50),
+        timestamp VARCHAR(50),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_message TEXT,
+        ai_response TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+)
+
+# Table DDL plus dropping the old procedure, sent as one multi-statement batch.
+# CREATE PROCEDURE stays a separate call since its body contains semicolons.
+MYSQL_SETUP_SQL = ";\n".join(MYSQL_TABLES + ("DROP PROCEDURE IF EXISTS sp_save_user_nutrition",))
+
 def setup_mysql_tables():
     """Create MySQL tables"""
-    cursor = db_connection.cursor()
-    
-    tables = [
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            age INT NOT NULL,
-            gender ENUM('male', 'female', 'other') NOT NULL,
-            height DECIMAL(5,2) NOT NULL,
-            weight DECIMAL(5,2) NOT NULL,
-            activity_level VARCHAR(20) NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS nutrition_profiles (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT,
-            bmi DECIMAL(5,2),
-            bmr DECIMAL(7,2),
-            tdee DECIMAL(7,2),
-            calorie_goal DECIMAL(7,2),
-            protein_goal DECIMAL(6,2),
-            carb_goal DECIMAL(6,2),
-            fat_goal DECIMAL(6,2),
-            water_goal DECIMAL(5,2),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS meal_logs (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            meal_id VARCHAR(50),
-            timestamp VARCHAR(50),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            user_message TEXT,
-            ai_response TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-    ]
-    
-    for table_sql in tables:
-        cursor.execute(table_sql)
-    
-    db_connection.commit()
-    cursor.close()
+    with mysql_connection() as connection:
+        cursor = connection.cursor()
+        
+        # One round trip for all tables; the iterator must be drained
+        for _ in cursor.execute(MYSQL_SETUP_SQL, multi=True):
+            pass
+        
+        cursor.execute(CREATE_SAVE_USER_NUTRITION_PROCEDURE_SQL)
+        
+        connection.commit()
+        cursor.close()
 
 def setup_mongodb_collections():
     """Setup MongoDB collections"""
@@ -952,13 +1306,17 @@ def setup_mongodb_collections():
         mongo_db.meal_logs.create_index("timestamp")
         mongo_db.chat_messages.create_index("timestamp")
 
+# Firestore collections the backend writes to
+FIREBASE_COLLECTIONS = ('users', 'meal_logs', 'chat_messages', 'wellness_logs', 'user_profiles', 'user_goals')
+
 def setup_firebase_collections():
     """Setup Firebase Firestore collections"""
     # Firebase collections are created automatically
-    # Add initial document to create collections
-    firebase_db.collection('users').document('init').set({"initialized": True})
-    firebase_db.collection('meal_logs').document('init').set({"initialized": True})
-    firebase_db.collection('chat_messages').document('init').set({"initialized": True})
+    # Add initial document to create collections, all in one batched commit
+    batch = firebase_db.batch()
+    for collection in FIREBASE_COLLECTIONS:
+        batch.set(firebase_db.collection(collection).document('init'), {"initialized": True})
+    batch.commit()
 
 @app.route('/api/ai/recipe-generator', methods=['POST'])
 def ai_recipe_generator():
@@ -983,24 +1341,30 @@ def ai_recipe_generator():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Recipe suggestions per mood; unknown moods get the "happy" list
+MOOD_RECIPES = {
+    "happy": [
+        {"name": "Colorful Rainbow Bowl", "mood_benefit": "Vibrant colors boost happiness", "calories": 380},
+        {"name": "Celebration Smoothie", "mood_benefit": "Fresh fruits enhance positive mood", "calories": 250}
+    ],
+    "stressed": [
+        {"name": "Calming Chamomile Oats", "mood_benefit": "Magnesium reduces stress", "calories": 320},
+        {"name": "Stress-Relief Salmon", "mood_benefit": "Omega-3 supports mental health", "calories": 420}
+    ],
+    "tired": [
+        {"name": "Energy Boost Quinoa", "mood_benefit": "Complex carbs provide sustained energy", "calories": 400},
+        {"name": "Iron-Rich Spinach Salad", "mood_benefit": "Iron fights fatigue", "calories": 280}
+    ]
+}
+
 def generate_ai_recipes(ingredients, dietary_restrictions, calorie_target, mood):
     """Generate mood and dietary-aware recipes"""
-    mood_recipes = {
-        "happy": [
-            {"name": "Colorful Rainbow Bowl", "mood_benefit": "Vibrant colors boost happiness", "calories": 380},
-            {"name": "Celebration Smoothie", "mood_benefit": "Fresh fruits enhance positive mood", "calories": 250}
-        ],
-        "stressed": [
-            {"name": "Calming Chamomile Oats", "mood_benefit": "Magnesium reduces stress", "calories": 320},
-            {"name": "Stress-Relief Salmon", "mood_benefit": "Omega-3 supports mental health", "calories": 420}
-        ],
-        "tired": [
-            {"name": "Energy Boost Quinoa", "mood_benefit": "Complex carbs provide sustained energy", "calories": 400},
-            {"name": "Iron-Rich Spinach Salad", "mood_benefit": "Iron fights fatigue", "calories": 280}
-        ]
-    }
-    
-    return mood_recipes.get(mood, mood_recipes["happy"])
+    return MOOD_RECIPES.get(mood, MOOD_RECIPES["happy"])
+
+def is_finite_number(value):
+    """True for JSON numbers other than NaN/Infinity (and not booleans)"""
+    return (isinstance(value, numbers.Real) and not isinstance(value, bool)
+            and math.isfinite(value))
 
 @app.route('/api/wellness/sleep-stress', methods=['POST'])
 def track_sleep_stress():
@@ -1009,6 +1373,8 @@ def track_sleep_stress():
         data = request.get_json()
         sleep_hours = data.get('sleep_hours', 8)
         stress_level = data.get('stress_level', 5)  # 1-10 scale
+        if not (is_finite_number(sleep_hours) and is_finite_number(stress_level)):
+            return jsonify({"error": "sleep_hours and stress_level must be finite numbers"}), 400
         
         # Generate wellness recommendations
         recommendations = generate_wellness_recommendations(sleep_hours, stress_level)
@@ -1053,65 +1419,136 @@ def generate_wellness_recommendations(sleep_hours, stress_level):
     
     return recommendations
 
+@lru_cache(maxsize=256)
 def calculate_wellness_score(sleep_hours, stress_level):
     """Calculate overall wellness score (0-100)"""
-    sleep_score = min(100, (sleep_hours / 8) * 50)  # Max 50 points
+    sleep_score = min(100, sleep_hours * 6.25)  # 50 points at 8 hours
     stress_score = max(0, 50 - (stress_level * 5))   # Max 50 points
     return round(sleep_score + stress_score)
 
+# Wellness check-ins are buffered and written in batches: a flush happens once
+# WELLNESS_FLUSH_SIZE rows are pending or WELLNESS_FLUSH_SECONDS after the first one
+WELLNESS_FLUSH_SIZE = 50
+WELLNESS_FLUSH_SECONDS = 2
+wellness_buffer = []
+wellness_buffer_lock = threading.Lock()
+wellness_flush_timer = None
+
 def save_wellness_data(sleep_hours, stress_level):
-    """Save wellness data to database"""
+    """Buffer wellness data for the next batched database write"""
+    global wellness_buffer, wellness_flush_timer
+    
+    rows = None
+    with wellness_buffer_lock:
+        wellness_buffer.append((sleep_hours, stress_level, request_now()))
+        
+        if len(wellness_buffer) >= WELLNESS_FLUSH_SIZE:
+            rows, wellness_buffer = wellness_buffer, []
+            if wellness_flush_timer:
+                wellness_flush_timer.cancel()
+                wellness_flush_timer = None
+        elif wellness_flush_timer is None:
+            wellness_flush_timer = threading.Timer(WELLNESS_FLUSH_SECONDS, flush_wellness_buffer)
+            wellness_flush_timer.daemon = True
+            wellness_flush_timer.start()
+    
+    if rows:
+        enqueue_db_write(save_wellness_logs, rows)
+
+def flush_wellness_buffer():
+    """Write out whatever wellness rows are pending"""
+    global wellness_buffer, wellness_flush_timer
+    
+    with wellness_buffer_lock:
+        rows, wellness_buffer = wellness_buffer, []
+        if wellness_flush_timer:
+            wellness_flush_timer.cancel()
+        wellness_flush_timer = None
+    
+    if rows:
+        save_wellness_logs(rows)
+
+def flush_pending_writes():
+    """Queue buffered wellness rows and wait, up to DB_WRITE_SHUTDOWN_TIMEOUT, for queued writes (shutdown hook)"""
+    global wellness_buffer, wellness_flush_timer
+    
+    # Run once: after gunicorn's worker_exit, the atexit call would wait again
+    atexit.unregister(flush_pending_writes)
+    
+    with wellness_buffer_lock:
+        rows, wellness_buffer = wellness_buffer, []
+        if wellness_flush_timer:
+            wellness_flush_timer.cancel()
+        wellness_flush_timer = None
+    
+    if rows:
+        enqueue_db_write(save_wellness_logs, rows)
+    
+    # Bounded wait: a hung database call must not hold the worker past gunicorn's
+    # graceful_timeout, after which it is killed and the writes are lost anyway
+    deadline = time.monotonic() + DB_WRITE_SHUTDOWN_TIMEOUT
+    while DB_WRITE_QUEUE.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+    
+    if DB_WRITE_QUEUE.unfinished_tasks:
+        print(f"⚠️  Shutdown: abandoning {DB_WRITE_QUEUE.unfinished_tasks} pending database writes")
+
+# The flush timer and writer threads are daemons, so flush before the process exits.
+# Gunicorn workers also call this from worker_exit (see gunicorn_conf.py).
+atexit.register(flush_pending_writes)
+
+def save_wellness_logs(rows):
+    """Save (sleep_hours, stress_level, timestamp) rows to database in a single batch"""
     try:
-        timestamp = datetime.now()
-        
-        if DATABASE_TYPE == 'mysql' and db_connection:
-            cursor = db_connection.cursor()
-            query = "INSERT INTO wellness_logs (sleep_hours, stress_level, timestamp) VALUES (%s, %s, %s)"
-            cursor.execute(query, (sleep_hours, stress_level, timestamp))
-            db_connection.commit()
-            cursor.close()
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor()
+                cursor.executemany(INSERT_WELLNESS_LOG_SQL, rows)
+                connection.commit()
+                cursor.close()
             
         elif DATABASE_TYPE == 'mongodb' and mongo_db:
-            mongo_db.wellness_logs.insert_one({
-                "sleep_hours": sleep_hours,
-                "stress_level": stress_level,
-                "timestamp": timestamp
-            })
+            mongo_db.wellness_logs.insert_many([
+                {"sleep_hours": sleep_hours, "stress_level": stress_level, "timestamp": timestamp}
+                for sleep_hours, stress_level, timestamp in rows
+            ], ordered=False)
             
         elif DATABASE_TYPE == 'firebase' and firebase_db:
-            firebase_db.collection('wellness_logs').add({
-                "sleep_hours": sleep_hours,
-                "stress_level": stress_level,
-                "timestamp": timestamp
-            })
+            wellness_logs = firebase_db.collection('wellness_logs')
+            batch = firebase_db.batch()
+            for sleep_hours, stress_level, timestamp in rows:
+                batch.set(wellness_logs.document(), {
+                    "sleep_hours": sleep_hours,
+                    "stress_level": stress_level,
+                    "timestamp": timestamp
+                })
+            batch.commit()
         else:
-            print(f"Wellness data saved locally (demo mode): {sleep_hours}h sleep, stress level {stress_level}")
+            print(f"{len(rows)} wellness entries saved locally (demo mode)")
             
     except Exception as e:
         print(f"Error saving wellness data: {e}")
 
+# Sample leaderboard data
+LEADERBOARD = (
+    {"rank": 1, "username": "HealthHero123", "score": 950, "streak": 15, "badge": "🏆"},
+    {"rank": 2, "username": "NutritionNinja", "score": 890, "streak": 12, "badge": "🥈"},
+    {"rank": 3, "username": "WellnessWarrior", "score": 850, "streak": 10, "badge": "🥉"},
+    {"rank": 4, "username": "HealthyEater", "score": 780, "streak": 8, "badge": "⭐"},
+    {"rank": 5, "username": "FitnessFan", "score": 720, "streak": 6, "badge": "💪"}
+)
+
+LEADERBOARD_BODY = app.json.dumps({
+    "success": True,
+    "leaderboard": LEADERBOARD,
+    "your_rank": 15,  # Sample user rank
+    "community_impact": "Together fighting hunger and promoting health!"
+})
+
 @app.route('/api/community/leaderboard', methods=['GET'])
 def get_leaderboard():
     """Get community leaderboard for gamification"""
-    try:
-        # Sample leaderboard data
-        leaderboard = [
-            {"rank": 1, "username": "HealthHero123", "score": 950, "streak": 15, "badge": "🏆"},
-            {"rank": 2, "username": "NutritionNinja", "score": 890, "streak": 12, "badge": "🥈"},
-            {"rank": 3, "username": "WellnessWarrior", "score": 850, "streak": 10, "badge": "🥉"},
-            {"rank": 4, "username": "HealthyEater", "score": 780, "streak": 8, "badge": "⭐"},
-            {"rank": 5, "username": "FitnessFan", "score": 720, "streak": 6, "badge": "💪"}
-        ]
-        
-        return jsonify({
-            "success": True,
-            "leaderboard": leaderboard,
-            "your_rank": 15,  # Sample user rank
-            "community_impact": "Together fighting hunger and promoting health!"
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return cached_json_response(LEADERBOARD_BODY, 60)
 
 @app.route('/api/sustainability/score', methods=['POST'])
 def calculate_sustainability_score():
@@ -1135,16 +1572,16 @@ def calculate_sustainability_score():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Meal-name keywords, matched case-insensitively in a single regex search
+PLANT_BASED_RE = re.compile(r"vegetable|fruit|quinoa|legume|bean", re.IGNORECASE)
+PROTEIN_FOODS_RE = re.compile(r"chicken|fish|egg|beans", re.IGNORECASE)
+VEGETABLE_FOODS_RE = re.compile(r"salad|vegetable|broccoli|spinach", re.IGNORECASE)
+
 def calculate_meal_sustainability(meals):
     """Calculate sustainability metrics for meals"""
     # Sample sustainability scoring
-    plant_based_score = 0
     total_meals = len(meals)
-    
-    for meal in meals:
-        if any(ingredient in meal.get('name', '').lower() 
-               for ingredient in ['vegetable', 'fruit', 'quinoa', 'legume', 'bean']):
-            plant_based_score += 1
+    plant_based_score = sum(1 for meal in meals if PLANT_BASED_RE.search(meal.get('name', '')))
     
     sustainability_score = (plant_based_score / total_meals * 100) if total_meals > 0 else 0
     
@@ -1169,10 +1606,14 @@ def process_donation():
     try:
         data = request.get_json()
         amount = data.get('amount', 0)
+        if not is_finite_number(amount):
+            return jsonify({"error": "amount must be a finite number"}), 400
         currency = data.get('currency', 'USD')
+        if not isinstance(currency, str):
+            return jsonify({"error": "currency must be a string"}), 400
         
         # Calculate meal impact
-        meals_provided = calculate_meal_impact(amount, currency)
+        meals_provided = calculate_meal_impact(amount)
         
         return jsonify({
             "success": True,
@@ -1186,11 +1627,13 @@ def process_donation():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def calculate_meal_impact(amount, currency):
+# Rough calculation: $2 per nutritious meal
+COST_PER_MEAL = 2.0
+
+@lru_cache(maxsize=1024)
+def calculate_meal_impact(amount):
     """Calculate how many meals a donation can provide"""
-    # Rough calculation: $2 per nutritious meal
-    cost_per_meal = 2.0
-    return round(amount / cost_per_meal)
+    return round(amount / COST_PER_MEAL)
 
 @app.route('/api/voice/process', methods=['POST'])
 def process_voice_command():
@@ -1213,84 +1656,88 @@ def process_voice_command():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Multi-language voice responses
+VOICE_RESPONSES = {
+    'en': {
+        'calories': "Your daily calorie needs depend on your personal profile. Use our calculator!",
+        'water': "Drink 8-10 glasses of water daily for optimal hydration.",
+        'protein': "Aim for 0.8-2.2 grams of protein per kilogram of body weight."
+    },
+    'am': {  # Amharic (simplified)
+        'calories': "የእርስዎ ዕለታዊ ካሎሪ ፍላጎት በግል መገለጫዎ ላይ ይወሰናል።",
+        'water': "ለተሻለ ውሃ አቅርቦት በቀን 8-10 ብርጭቆ ውሃ ይጠጡ።",
+        'protein': "በኪሎግራም ክብደት 0.8-2.2 ግራም ፕሮቲን ያስፈልጋል።"
+    },
+    'sw': {  # Swahili
+        'calories': "Mahitaji yako ya kila siku ya kalori yanategemea wasifu wako binafsi.",
+        'water': "Nywa mikooa 8-10 ya maji kila siku kwa afya bora.",
+        'protein': "Lenga gramu 0.8-2.2 za protini kwa kila kilogramu ya uzito."
+    },
+    'fr': {  # French
+        'calories': "Vos besoins caloriques quotidiens dépendent de votre profil personnel.",
+        'water': "Buvez 8-10 verres d'eau par jour pour une hydratation optimale.",
+        'protein': "Visez 0,8-2,2 grammes de protéines par kilogramme de poids corporel."
+    }
+}
+
+# Every language answers the same keywords; one alternation scans the text once
+VOICE_KEYWORDS = dict.fromkeys(keyword for responses in VOICE_RESPONSES.values() for keyword in responses)
+VOICE_KEYWORD_RE = re.compile('|'.join(map(re.escape, VOICE_KEYWORDS)), re.IGNORECASE)
+
 def process_voice_nutrition_command(text, language):
     """Process voice commands in multiple languages"""
-    # Multi-language responses
-    responses = {
-        'en': {
-            'calories': "Your daily calorie needs depend on your personal profile. Use our calculator!",
-            'water': "Drink 8-10 glasses of water daily for optimal hydration.",
-            'protein': "Aim for 0.8-2.2 grams of protein per kilogram of body weight."
-        },
-        'am': {  # Amharic (simplified)
-            'calories': "የእርስዎ ዕለታዊ ካሎሪ ፍላጎት በግል መገለጫዎ ላይ ይወሰናል።",
-            'water': "ለተሻለ ውሃ አቅርቦት በቀን 8-10 ብርጭቆ ውሃ ይጠጡ።",
-            'protein': "በኪሎግራም ክብደት 0.8-2.2 ግራም ፕሮቲን ያስፈልጋል።"
-        },
-        'sw': {  # Swahili
-            'calories': "Mahitaji yako ya kila siku ya kalori yanategemea wasifu wako binafsi.",
-            'water': "Nywa mikooa 8-10 ya maji kila siku kwa afya bora.",
-            'protein': "Lenga gramu 0.8-2.2 za protini kwa kila kilogramu ya uzito."
-        },
-        'fr': {  # French
-            'calories': "Vos besoins caloriques quotidiens dépendent de votre profil personnel.",
-            'water': "Buvez 8-10 verres d'eau par jour pour une hydratation optimale.",
-            'protein': "Visez 0,8-2,2 grammes de protéines par kilogramme de poids corporel."
-        }
-    }
-    
-    text_lower = text.lower()
-    lang_responses = responses.get(language, responses['en'])
+    found = {keyword.lower() for keyword in VOICE_KEYWORD_RE.findall(text)}
+    lang_responses = VOICE_RESPONSES.get(language, VOICE_RESPONSES['en'])
     
+    # Keep the original priority: first keyword in the language's order wins
     for keyword, response in lang_responses.items():
-        if keyword in text_lower:
+        if keyword in found:
             return response
     
     return lang_responses.get('calories', "I'm here to help with nutrition questions!")
 
+# Sample weekly challenges
+WEEKLY_CHALLENGES = (
+    {
+        "id": "hydration-hero",
+        "title": "💧 Hydration Hero",
+        "description": "Drink 8 glasses of water daily for 7 days",
+        "progress": 5,
+        "target": 7,
+        "reward": "50 points + Hydration Badge",
+        "sdg_link": "Supporting good health (SDG 3)"
+    },
+    {
+        "id": "veggie-champion",
+        "title": "🥬 Veggie Champion",
+        "description": "Eat 5 servings of vegetables daily",
+        "progress": 3,
+        "target": 7,
+        "reward": "75 points + Plant Power Badge",
+        "sdg_link": "Fighting hunger with nutrition (SDG 2)"
+    },
+    {
+        "id": "community-helper",
+        "title": "🤝 Community Helper",
+        "description": "Share 3 healthy recipes with the community",
+        "progress": 1,
+        "target": 3,
+        "reward": "100 points + Community Hero Badge",
+        "sdg_link": "Building supportive communities (SDG 2 & 3)"
+    }
+)
+
+WEEKLY_CHALLENGES_BODY = app.json.dumps({
+    "success": True,
+    "challenges": WEEKLY_CHALLENGES,
+    "total_points_available": 225,
+    "community_message": "Join thousands fighting hunger and promoting health!"
+})
+
 @app.route('/api/challenges/weekly', methods=['GET'])
 def get_weekly_challenges():
     """Get weekly nutrition challenges for gamification"""
-    try:
-        challenges = [
-            {
-                "id": "hydration-hero",
-                "title": "💧 Hydration Hero",
-                "description": "Drink 8 glasses of water daily for 7 days",
-                "progress": 5,
-                "target": 7,
-                "reward": "50 points + Hydration Badge",
-                "sdg_link": "Supporting good health (SDG 3)"
-            },
-            {
-                "id": "veggie-champion",
-                "title": "🥬 Veggie Champion",
-                "description": "Eat 5 servings of vegetables daily",
-                "progress": 3,
-                "target": 7,
-                "reward": "75 points + Plant Power Badge",
-                "sdg_link": "Fighting hunger with nutrition (SDG 2)"
-            },
-            {
-                "id": "community-helper",
-                "title": "🤝 Community Helper",
-                "description": "Share 3 healthy recipes with the community",
-                "progress": 1,
-                "target": 3,
-                "reward": "100 points + Community Hero Badge",
-                "sdg_link": "Building supportive communities (SDG 2 & 3)"
-            }
-        ]
-        
-        return jsonify({
-            "success": True,
-            "challenges": challenges,
-            "total_points_available": 225,
-            "community_message": "Join thousands fighting hunger and promoting health!"
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return cached_json_response(WEEKLY_CHALLENGES_BODY, 60)
 
 @app.route('/api/analytics/deficiency-check', methods=['POST'])
 def check_nutritional_deficiencies():
@@ -1322,10 +1769,10 @@ def analyze_nutritional_gaps(meals):
     }
     
     for meal in meals:
-        meal_name = meal.get('name', '').lower()
-        if any(protein in meal_name for protein in ['chicken', 'fish', 'egg', 'beans']):
+        meal_name = meal.get('name', '')
+        if PROTEIN_FOODS_RE.search(meal_name):
             food_groups['protein'] += 1
-        if any(veg in meal_name for veg in ['salad', 'vegetable', 'broccoli', 'spinach']):
+        if VEGETABLE_FOODS_RE.search(meal_name):
             food_groups['vegetables'] += 1
         # Add more analysis...
     
@@ -1447,96 +1894,87 @@ def save_user_goals():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Sample achievements data (the same for every user until accounts exist)
+ACHIEVEMENTS_BODY = app.json.dumps({
+    "success": True,
+    "achievements": {
+        "total_meals": 127,
+        "streak_days": 15,
+        "points_earned": 1340,
+        "badges_earned": 8,
+        "recent_achievements": [
+            {"type": "challenge", "title": "Hydration Hero", "date": "2025-08-28", "points": 50},
+            {"type": "badge", "title": "Plant Power", "date": "2025-08-25", "points": 75},
+            {"type": "streak", "title": "15-Day Streak", "date": "2025-09-01", "points": 100}
+        ],
+        "wellness_score": 85,
+        "sustainability_score": 72
+    },
+    "community_rank": 15,
+    "sdg_impact": "Your consistent tracking helps promote health awareness!"
+})
+
 @app.route('/api/profile/achievements', methods=['GET'])
 def get_user_achievements():
     """Get user achievements and badges"""
-    try:
-        user_id = request.args.get('user_id', 'demo_user')
-        
-        # Sample achievements data
-        achievements = {
-            "total_meals": 127,
-            "streak_days": 15,
-            "points_earned": 1340,
-            "badges_earned": 8,
-            "recent_achievements": [
-                {"type": "challenge", "title": "Hydration Hero", "date": "2025-08-28", "points": 50},
-                {"type": "badge", "title": "Plant Power", "date": "2025-08-25", "points": 75},
-                {"type": "streak", "title": "15-Day Streak", "date": "2025-09-01", "points": 100}
-            ],
-            "wellness_score": 85,
-            "sustainability_score": 72
-        }
-        
-        return jsonify({
-            "success": True,
-            "achievements": achievements,
-            "community_rank": 15,
-            "sdg_impact": "Your consistent tracking helps promote health awareness!"
-        })
-        
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
-
+    return cached_json_response(ACHIEVEMENTS_BODY, 60)
+
+
+# Sample grocery list template
+GROCERY_ITEMS = {
+    "proteins": ["Chicken breast (1kg)", "Salmon fillet (500g)", "Eggs (12 pack)"],
+    "vegetables": ["Spinach (200g)", "Broccoli (300g)", "Tomatoes (500g)"],
+    "grains": ["Brown rice (1kg)", "Quinoa (500g)", "Whole wheat bread"],
+    "fruits": ["Bananas (6 pieces)", "Apples (6 pieces)", "Berries (250g)"],
+    "others": ["Olive oil (500ml)", "Greek yogurt (1L)", "Avocados (3 pieces)"]
+}
+GROCERY_SUSTAINABILITY_TIPS = (
+    "🌱 Choose organic when possible",
+    "🌍 Buy local and seasonal produce",
+    "♻️ Bring reusable bags",
+    "🥬 Prioritize plant-based proteins"
+)
 
 def create_smart_grocery_list(meal_plan, days):
     """Create optimized grocery list with sustainability focus"""
-    # Sample grocery list generation
-    grocery_items = {
-        "proteins": ["Chicken breast (1kg)", "Salmon fillet (500g)", "Eggs (12 pack)"],
-        "vegetables": ["Spinach (200g)", "Broccoli (300g)", "Tomatoes (500g)"],
-        "grains": ["Brown rice (1kg)", "Quinoa (500g)", "Whole wheat bread"],
-        "fruits": ["Bananas (6 pieces)", "Apples (6 pieces)", "Berries (250g)"],
-        "others": ["Olive oil (500ml)", "Greek yogurt (1L)", "Avocados (3 pieces)"]
-    }
-    
     return {
-        "categories": grocery_items,
+        "categories": GROCERY_ITEMS,
         "estimated_cost": "$45-60 USD",
-        "sustainability_tips": [
-            "🌱 Choose organic when possible",
-            "🌍 Buy local and seasonal produce",
-            "♻️ Bring reusable bags",
-            "🥬 Prioritize plant-based proteins"
-        ],
+        "sustainability_tips": GROCERY_SUSTAINABILITY_TIPS,
         "meal_count": len(meal_plan) * days
     }
 
 def save_user_profile_data(profile_data):
     """Save user profile data to database"""
     try:
-        profile_id = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        if DATABASE_TYPE == 'mysql' and db_connection:
-            cursor = db_connection.cursor()
-            query = """
-            INSERT INTO user_profiles 
-            (profile_id, name, email, age, height, weight, activity_level, 
-             dietary_restrictions, goals, created_at) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (
-                profile_id, profile_data.get('name'), profile_data.get('email'),
-                profile_data.get('age'), profile_data.get('height'), 
-                profile_data.get('weight'), profile_data.get('activity'),
-                ','.join(profile_data.get('dietary_restrictions', [])),
-                json.dumps(profile_data.get('goals', {})),
-                datetime.now()
-            ))
-            db_connection.commit()
-            cursor.close()
+        now = request_now()
+        profile_id = f"profile_{now:%Y%m%d_%H%M%S}"
+        
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(INSERT_USER_PROFILE_SQL, (
+                    profile_id, profile_data.get('name'), profile_data.get('email'),
+                    profile_data.get('age'), profile_data.get('height'), 
+                    profile_data.get('weight'), profile_data.get('activity'),
+                    ','.join(profile_data.get('dietary_restrictions', [])),
+                    app.json.dumps(profile_data.get('goals', {})),
+                    now
+                ))
+                connection.commit()
+                cursor.close()
             
         elif DATABASE_TYPE == 'mongodb' and mongo_db:
             mongo_db.user_profiles.insert_one({
                 "profile_id": profile_id,
                 **profile_data,
-                "created_at": datetime.now()
+                "created_at": now
             })
             
         elif DATABASE_TYPE == 'firebase' and firebase_db:
             firebase_db.collection('user_profiles').document(profile_id).set({
                 **profile_data,
-                "created_at": datetime.now()
+                "created_at": now
             })
         else:
             print(f"Profile saved locally (demo mode): {profile_data.get('name')}")
@@ -1550,12 +1988,13 @@ def save_user_profile_data(profile_data):
 def get_user_profile_data(user_id):
     """Get user profile data from database"""
     try:
-        if DATABASE_TYPE == 'mysql' and db_connection:
-            cursor = db_connection.cursor(dictionary=True)
-            query = "SELECT * FROM user_profiles WHERE profile_id = %s OR id = %s ORDER BY created_at DESC LIMIT 1"
-            cursor.execute(query, (user_id, user_id))
-            result = cursor.fetchone()
-            cursor.close()
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                query = "SELECT * FROM user_profiles WHERE profile_id = %s OR id = %s ORDER BY created_at DESC LIMIT 1"
+                cursor.execute(query, (user_id, user_id))
+                result = cursor.fetchone()
+                cursor.close()
             if result:
                 return result
                 
@@ -1592,34 +2031,31 @@ def get_user_profile_data(user_id):
 def save_user_goals_data(goals_data):
     """Save user goals to database"""
     try:
-        goals_id = f"goals_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        
-        if DATABASE_TYPE == 'mysql' and db_connection:
-            cursor = db_connection.cursor()
-            query = """
-            INSERT INTO user_goals 
-            (goals_id, daily_calories, protein_grams, water_liters, weight_goal, created_at) 
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (
-                goals_id, goals_data.get('daily_calories'),
-                goals_data.get('protein_grams'), goals_data.get('water_liters'),
-                goals_data.get('weight_goal'), datetime.now()
-            ))
-            db_connection.commit()
-            cursor.close()
+        now = request_now()
+        goals_id = f"goals_{now:%Y%m%d_%H%M%S}"
+        
+        if DATABASE_TYPE == 'mysql' and mysql_pool:
+            with mysql_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(INSERT_USER_GOALS_SQL, (
+                    goals_id, goals_data.get('daily_calories'),
+                    goals_data.get('protein_grams'), goals_data.get('water_liters'),
+                    goals_data.get('weight_goal'), now
+                ))
+                connection.commit()
+                cursor.close()
             
         elif DATABASE_TYPE == 'mongodb' and mongo_db:
             mongo_db.user_goals.insert_one({
                 "goals_id": goals_id,
                 **goals_data,
-                "created_at": datetime.now()
+                "created_at": now
             })
             
         elif DATABASE_TYPE == 'firebase' and firebase_db:
             firebase_db.collection('user_goals').document(goals_id).set({
                 **goals_data,
-                "created_at": datetime.now()
+                "created_at": now
             })
         else:
             print(f"Goals saved locally (demo mode): {goals_data}")
@@ -1637,4 +2073,5 @@ if __name__ == '__main__':
     print("🚀 Server running on http://localhost:5000")
     print("✨ Advanced Features: AI, Community, Wellness, Sustainability")
     
+    # Development server only; in production run: gunicorn -c gunicorn_conf.py app:app
     app.run(debug=True, host='0.0.0.0', port=5000)
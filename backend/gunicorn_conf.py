@@ -0,0 +1,43 @@
+"""
+SmartEats - Gunicorn configuration for the Flask backend
+Usage: gunicorn -c gunicorn_conf.py app:app
+"""
+
+import multiprocessing
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: the database drivers and external API calls are blocking,
+# so each worker serves several requests while others wait on I/O
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# MySQL connection budget: every worker opens its whole pool at import, and
+# app.py sizes that pool to threads + DB_WRITE_WORKERS + 1 (wellness flush).
+# workers * pool size must stay under the server's max_connections (151 by
+# default), minus some headroom for admin and other clients.
+mysql_pool_size = int(os.getenv(
+    'MYSQL_POOL_SIZE', threads + int(os.getenv('DB_WRITE_WORKERS', 4)) + 1
+))
+mysql_connection_budget = int(os.getenv('MYSQL_MAX_CONNECTIONS', 151)) - 10
+
+default_workers = multiprocessing.cpu_count() * 2 + 1
+if os.getenv('DATABASE_TYPE', 'mysql') == 'mysql':
+    default_workers = max(1, min(default_workers, mysql_connection_budget // mysql_pool_size))
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+
+# Reuse client connections behind the load balancer
+keepalive = 30
+timeout = 120
+
+# Not preloaded: app.py opens database pools and starts the background write
+# threads at import time, and those must be created in each worker, not the master
+preload_app = False
+
+def worker_exit(server, worker):
+    """Flush buffered wellness rows and queued writes before the worker goes away"""
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        app_module.flush_pending_writes()
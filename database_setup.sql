@@ -48,6 +48,27 @@ CREATE TABLE IF NOT EXISTS chat_messages (
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Saves a user and their nutrition profile in one call (used by the backend)
+DROP PROCEDURE IF EXISTS sp_save_user_nutrition;
+DELIMITER $$
+CREATE PROCEDURE sp_save_user_nutrition(
+    IN p_age INT, IN p_gender VARCHAR(10), IN p_height DECIMAL(5,2),
+    IN p_weight DECIMAL(5,2), IN p_activity_level VARCHAR(20),
+    IN p_bmi DECIMAL(5,2), IN p_bmr DECIMAL(7,2), IN p_tdee DECIMAL(7,2),
+    IN p_calorie_goal DECIMAL(7,2), IN p_protein_goal DECIMAL(6,2),
+    IN p_carb_goal DECIMAL(6,2), IN p_fat_goal DECIMAL(6,2), IN p_water_goal DECIMAL(5,2)
+)
+BEGIN
+    INSERT INTO users (age, gender, height, weight, activity_level)
+    VALUES (p_age, p_gender, p_height, p_weight, p_activity_level);
+    
+    INSERT INTO nutrition_profiles
+    (user_id, bmi, bmr, tdee, calorie_goal, protein_goal, carb_goal, fat_goal, water_goal)
+    VALUES (LAST_INSERT_ID(), p_bmi, p_bmr, p_tdee, p_calorie_goal, p_protein_goal,
+            p_carb_goal, p_fat_goal, p_water_goal);
+END$$
+DELIMITER ;
+
 -- Insert sample data
 INSERT IGNORE INTO users (id, age, gender, height, weight, activity_level) VALUES 
 (1, 25, 'male', 175, 70, 'moderate');